@@ -1,18 +1,28 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+import json
 import logging
 import sys
 
-from text_to_sql_agent.schema_analysis import (
-    build_schema_context,
-    extract_schema_entities,
+from text_to_sql_agent.db_registry import (
+    DatabaseHandle,
+    UnknownDatabaseError,
+    get_database_registry,
 )
-from text_to_sql_agent.runtime_bootstrap import TABLES, FOREIGN_KEYS
 from text_to_sql_agent.config import settings
-from text_to_sql_agent.models.models import ChatRequest
-from text_to_sql_agent.agent import agent
+from text_to_sql_agent.models.models import BatchChatRequest, ChatRequest
+from text_to_sql_agent.agent import get_agent
 from text_to_sql_agent.graph_build import build_graph
 from text_to_sql_agent.state_initializer import build_initial_state
-from text_to_sql_agent.runtime.execution_guard import safe_execute_graph
+from text_to_sql_agent.result_processing.summary_store import get_summary_store
+from text_to_sql_agent.runtime.llm_batching import BatchingChatModel
+from text_to_sql_agent.runtime.metrics import render_metrics
+from text_to_sql_agent.runtime.execution_guard import (
+    abatch_execute_graph,
+    asafe_execute_graph,
+    astream_execute_graph,
+)
 
 logging.basicConfig(
     level=settings.log_level,
@@ -21,31 +31,93 @@ logging.basicConfig(
     force=True,
 )
 
-app = FastAPI()
-graph = build_graph(agent)
+# Built lazily (lifespan / first request); may be injected beforehand
+agent = None
+graph = None
 
 
-@app.post("/chat")
-def chat(request: ChatRequest):
+def _agent():
+    global agent
+    if agent is None:
+        agent = get_agent()
+    return agent
+
+
+def _graph():
+    global graph
+    if graph is None:
+        graph = build_graph(_agent())
+    return graph
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    All expensive initialization happens here, not at import:
+    default database schema (from the persisted snapshot when still
+    valid) and table sizes, LLM client and the compiled graph. Other
+    databases load on their first request.
+    """
+    database = get_database_registry().get()
+    database.catalog
+    if settings.plan_gate != "off":
+        database.table_rows
+    _graph()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _acquire_database(database_id: str | None) -> DatabaseHandle:
+    """
+    Target database of a request, pinned (kept resident) until
+    _release_database, so later steps never reload it mid-request.
+    """
+    try:
+        return get_database_registry().acquire(database_id)
+    except UnknownDatabaseError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown database id '{database_id}'.",
+        )
+
+
+def _release_database(database: DatabaseHandle):
+    get_database_registry().release(database)
+
+
+def _initial_state(request: ChatRequest, database: DatabaseHandle, llm=None):
     # ------------------------------------------------------------
-    # Schema analysis (single source of truth)
+    # Schema catalog of the target database (loaded on first use)
     # ------------------------------------------------------------
-    schema_context = build_schema_context(TABLES, FOREIGN_KEYS)
+    catalog = database.catalog
 
-    # Derive schema entities deterministically
-    schema_entities = extract_schema_entities(TABLES)
+    schema_context = catalog.schema_context
+    schema_entities = catalog.schema_entities
 
     # ------------------------------------------------------------
     # Proper state initialization (PASS LLM)
     # ------------------------------------------------------------
-    state = build_initial_state(
+    return build_initial_state(
         user_query=request.query,
         schema_context=schema_context,
         schema_entities=schema_entities,
-        llm=agent,
+        llm=llm or _agent(),
+        summary_mode=request.summary_mode or settings.summary_mode,
+        database_id=database.database_id,
     )
 
-    response = safe_execute_graph(graph, state)
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    database = _acquire_database(request.database_id)
+
+    try:
+        state = _initial_state(request, database)
+        response = await asafe_execute_graph(_graph(), state)
+    finally:
+        _release_database(database)
 
     api_response = {
         "answer": response["result"],
@@ -61,3 +133,121 @@ def chat(request: ChatRequest):
         api_response["invoked_tools"] = response["invoked_tools"]
 
     return api_response
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    Answer many questions in one call.
+
+    Identical questions run once; distinct ones run concurrently
+    (BATCH_MAX_CONCURRENCY) and their LLM calls are coalesced into
+    ChatModel.abatch calls. Results keep the input order.
+    """
+    if len(request.queries) > settings.batch_max_queries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.batch_max_queries} queries per batch.",
+        )
+
+    llm = BatchingChatModel(
+        _agent(),
+        max_batch_size=settings.llm_batch_max_size,
+        max_wait_seconds=settings.llm_batch_max_wait_ms / 1000,
+    )
+    batch_graph = build_graph(llm)
+    database = _acquire_database(request.database_id)
+
+    try:
+        states = [
+            _initial_state(
+                ChatRequest(
+                    query=query,
+                    summary_mode=request.summary_mode,
+                    database_id=request.database_id,
+                ),
+                database,
+                llm,
+            )
+            for query in request.queries
+        ]
+
+        responses = await abatch_execute_graph(
+            batch_graph, states, settings.batch_max_concurrency
+        )
+    finally:
+        _release_database(database)
+
+    return {
+        "results": responses,
+        "metadata": {
+            "queries": len(states),
+            "unique_queries": len({r["request_id"] for r in responses}),
+            **llm.stats(),
+        },
+    }
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Stream graph progress, result rows and the summary as they happen.
+    NDJSON by default; Server-Sent Events when the client accepts them.
+    """
+    database = _acquire_database(request.database_id)
+
+    try:
+        state = _initial_state(request, database)
+    except Exception:
+        _release_database(database)
+        raise
+
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def _encode():
+        try:
+            async for event in astream_execute_graph(_graph(), state):
+                payload = json.dumps(event, default=str)
+                if use_sse:
+                    yield f"event: {event['event']}\ndata: {payload}\n\n"
+                else:
+                    yield payload + "\n"
+        finally:
+            _release_database(database)
+
+    return StreamingResponse(
+        _encode(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+    )
+
+
+@app.get("/chat/summary/{summary_id}")
+async def chat_summary(summary_id: str):
+    """
+    Fetch a post-execution summary requested with summary_mode="deferred".
+    """
+    summary = get_summary_store().get(summary_id)
+
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired summary id.")
+
+    return summary
+
+
+@app.get("/stats/db")
+def db_stats():
+    """
+    Resident databases: request counts, schema state and connection
+    pool usage (sync / async engines) per database id.
+    """
+    return get_database_registry().stats()
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus exposition: per-node latency, LLM tokens, DB execution
+    time, rows returned, retries and request outcomes.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
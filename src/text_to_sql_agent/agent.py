@@ -1,3 +1,6 @@
+import logging
+from functools import lru_cache
+
 from text_to_sql_agent.agent_factory import get_llm
 from text_to_sql_agent.config import settings
 
@@ -5,5 +8,21 @@ from text_to_sql_agent.config import settings
 LLM configuration for SQL generation.
 """
 
-agent = get_llm()
-print("LLM provider:", settings.llm_provider)
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_agent():
+    """
+    Process-wide LLM client, constructed on first use.
+    """
+    logger.info(f"LLM provider: {settings.llm_provider}")
+    return get_llm()
+
+
+def __getattr__(name: str):
+    # Legacy `from text_to_sql_agent.agent import agent`
+    if name == "agent":
+        return get_agent()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,3 @@
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
-
 from text_to_sql_agent.config import settings
 
 
@@ -9,7 +6,10 @@ def get_llm():
     Factory that returns a LangChain ChatModel
     based on configuration.
     """
+    # Provider SDKs are imported on demand (only the configured one)
     if settings.llm_provider == "ollama":
+        from langchain_ollama import ChatOllama
+
         return ChatOllama(
             base_url=settings.ollama_base_url,
             model=settings.ollama_model,
@@ -17,6 +17,8 @@ def get_llm():
         )
 
     if settings.llm_provider == "openai":
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(
             model=settings.openai_model,
             api_key=settings.openai_api_key,
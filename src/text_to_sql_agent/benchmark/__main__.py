@@ -0,0 +1,82 @@
+"""
+Offline end-to-end benchmark (no network, stub LLM).
+
+    python -m text_to_sql_agent.benchmark --concurrency 1,4,16 \
+        --output bench.json --baseline bench_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Every repeat must exercise generation / validation / execution,
+# not the question, template or result caches
+os.environ.setdefault("SQL_CACHE_BACKEND", "off")
+os.environ.setdefault("SQL_TEMPLATE_CACHE_MAX_ENTRIES", "0")
+os.environ.setdefault("RESULT_CACHE_MAX_BYTES", "0")
+# Few-shot examples stay in memory (no store file next to .env)
+os.environ.setdefault("FEW_SHOT_STORE_PATH", "")
+
+from text_to_sql_agent.benchmark.harness import (  # noqa: E402
+    DEFAULT_CORPUS,
+    compare_results,
+    load_corpus,
+    run_benchmark,
+)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m text_to_sql_agent.benchmark")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+
+    results = asyncio.run(
+        run_benchmark(
+            load_corpus(args.corpus),
+            concurrency_levels=[int(c) for c in args.concurrency.split(",")],
+            iterations=args.iterations,
+            llm_latency_ms=args.llm_latency_ms,
+        )
+    )
+
+    for level in results["levels"]:
+        latency = level["latency_ms"]
+        print(
+            f"c={level['concurrency']:<3} {level['throughput_rps']:>8} rps  "
+            f"p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms  "
+            f"retries={level['retries']} repairs={level['repairs']} "
+            f"llm_calls/req={level['llm_calls_per_request']} "
+            f"first_pass_valid={level['first_pass_valid_rate']} "
+            f"few_shot_hits={level['few_shot_hit_rate']} "
+            f"errors={level['errors']} mismatches={len(level['mismatches'])}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_results(results, json.load(f), args.tolerance)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
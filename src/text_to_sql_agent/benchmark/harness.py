@@ -0,0 +1,281 @@
+import asyncio
+import json
+import platform
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+from text_to_sql_agent.benchmark.stub_llm import StubChatModel
+from text_to_sql_agent.caching.plan_cache import get_plan_cache
+from text_to_sql_agent.caching.result_cache import canonicalize_sql
+from text_to_sql_agent.caching.validation_cache import get_validation_cache
+from text_to_sql_agent.graph_build import build_graph
+from text_to_sql_agent.grounding.example_store import get_example_store
+from text_to_sql_agent.runtime_bootstrap import get_runtime_catalog
+from text_to_sql_agent.sql_tools.sql_parsing import parse_query
+from text_to_sql_agent.state_initializer import build_initial_state
+
+DEFAULT_CORPUS = Path(__file__).with_name("corpus.json")
+
+# Node-level changes below this are noise, not regressions
+MIN_REGRESSION_MS = 0.5
+
+
+def load_corpus(path: str | Path = DEFAULT_CORPUS) -> list[dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """
+    Linear-interpolated percentile (q in [0, 100]).
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _distribution(values: list[float]) -> dict[str, float | int | None]:
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3) if values else None,
+        "p50": _round(percentile(values, 50)),
+        "p95": _round(percentile(values, 95)),
+        "p99": _round(percentile(values, 99)),
+    }
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+# ============================================================
+# Single request
+# ============================================================
+async def run_question(graph, llm, question: str) -> dict[str, Any]:
+    """
+    Run one question through the graph.
+    Per-node wall times come from GraphState.node_timings.
+    """
+    catalog = get_runtime_catalog()
+    state = build_initial_state(
+        user_query=question,
+        schema_context=catalog.schema_context,
+        schema_entities=catalog.schema_entities,
+        llm=llm,
+        summary_mode="inline",
+    )
+
+    final_state: dict[str, Any] = {}
+    error = None
+
+    start = time.perf_counter()
+
+    try:
+        final_state = await graph.ainvoke(state) or {}
+    except Exception as e:
+        error = type(e).__name__
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    invoked = final_state.get("invoked_tools") or []
+    answer = final_state.get("final_answer") or {}
+    nodes = [(t["node"], t["ms"]) for t in final_state.get("node_timings") or []]
+    generated = any(node == "generate_sql" for node, _ in nodes)
+
+    return {
+        "question": question,
+        "latency_ms": latency_ms,
+        "nodes": nodes,
+        "answer_type": answer.get("type"),
+        "retries": final_state.get("retry_count") or 0,
+        "repairs": sum(1 for t in invoked if t.get("tool") == "repair_sql_query"),
+        "llm_calls": len(final_state.get("prompt_usage") or []),
+        # Generated SQL that validated without a retry (None: no generation)
+        "first_pass_valid": (final_state.get("retry_count") or 0) == 0 if generated else None,
+        "few_shot_hit": bool(final_state.get("few_shot_examples")) if generated else None,
+        "error": error,
+    }
+
+
+# ============================================================
+# Concurrency level
+# ============================================================
+def _rate(flags: list[bool | None]) -> float | None:
+    """
+    Share of True among runs where the flag applies (not None).
+    """
+    counted = [flag for flag in flags if flag is not None]
+    return round(sum(counted) / len(counted), 3) if counted else None
+
+
+def reset_caches() -> None:
+    """
+    Drop the per-process memos (validation verdicts, plans, parsed and
+    canonical SQL, few-shot examples), so no level inherits a warm
+    state from the warm-up or the previous level.
+    """
+    get_validation_cache().clear()
+
+    plans = get_plan_cache()
+    if plans is not None:
+        plans.clear()
+
+    parse_query.cache_clear()
+    canonicalize_sql.cache_clear()
+
+    examples = get_example_store()
+    if examples is not None:
+        examples.clear()
+
+
+async def run_level(
+    graph,
+    llm,
+    corpus: list[dict[str, Any]],
+    concurrency: int,
+    iterations: int,
+) -> dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    questions = [entry["question"] for entry in corpus] * iterations
+    expected = {entry["question"]: entry.get("expect") for entry in corpus}
+
+    async def _bounded(question):
+        async with semaphore:
+            return await run_question(graph, llm, question)
+
+    start = time.perf_counter()
+    runs = await asyncio.gather(*(_bounded(q) for q in questions))
+    wall_s = time.perf_counter() - start
+
+    per_node: dict[str, list[float]] = defaultdict(list)
+    for run in runs:
+        for node, ms in run["nodes"]:
+            per_node[node].append(ms)
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(runs),
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(runs) / wall_s, 2) if wall_s else None,
+        "latency_ms": _distribution([r["latency_ms"] for r in runs]),
+        "nodes": {node: _distribution(ms) for node, ms in sorted(per_node.items())},
+        "retries": sum(r["retries"] for r in runs),
+        "repairs": sum(r["repairs"] for r in runs),
+        "llm_calls_per_request": round(sum(r["llm_calls"] for r in runs) / len(runs), 3),
+        "first_pass_valid_rate": _rate([r["first_pass_valid"] for r in runs]),
+        "few_shot_hit_rate": _rate([r["few_shot_hit"] for r in runs]),
+        "errors": sum(1 for r in runs if r["error"]),
+        "mismatches": sorted({
+            r["question"] for r in runs
+            if expected.get(r["question"]) not in (None, r["answer_type"])
+        }),
+    }
+
+
+async def run_benchmark(
+    corpus: list[dict[str, Any]],
+    concurrency_levels: Iterable[int] = (1, 4, 16),
+    iterations: int = 5,
+    llm_latency_ms: float = 0.0,
+    warmup: bool = True,
+) -> dict[str, Any]:
+    """
+    Replay the corpus against chinook.db with a stub LLM at each
+    concurrency level and collect latency / throughput statistics.
+    """
+    llm = StubChatModel(
+        responses={entry["question"]: entry for entry in corpus},
+        latency_seconds=llm_latency_ms / 1000,
+    )
+    graph = build_graph(llm)
+
+    if warmup:
+        # Import-time / first-connection costs are not pipeline overhead
+        await run_level(graph, llm, corpus, concurrency=1, iterations=1)
+
+    levels = []
+    for c in concurrency_levels:
+        reset_caches()
+        levels.append(
+            await run_level(graph, llm, corpus, concurrency=c, iterations=iterations)
+        )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "corpus_size": len(corpus),
+            "iterations": iterations,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "levels": levels,
+    }
+
+
+# ============================================================
+# Baseline comparison
+# ============================================================
+def _exceeds(current: float | None, baseline: float | None, tolerance: float) -> bool:
+    if current is None or baseline is None:
+        return False
+    return current - baseline > max(baseline * tolerance, MIN_REGRESSION_MS)
+
+
+def compare_results(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = 0.10,
+) -> list[str]:
+    """
+    Regressions of current vs baseline, per matching concurrency level:
+    p95 request / node latency up, throughput down (beyond tolerance),
+    or new errors / answer-type mismatches.
+    """
+    regressions = []
+    baseline_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+
+    for level in current.get("levels", []):
+        c = level["concurrency"]
+        base = baseline_levels.get(c)
+        if base is None:
+            continue
+
+        if _exceeds(level["latency_ms"]["p95"], base["latency_ms"]["p95"], tolerance):
+            regressions.append(
+                f"c={c}: p95 latency {base['latency_ms']['p95']} → {level['latency_ms']['p95']} ms"
+            )
+
+        if (
+            level["throughput_rps"] is not None
+            and base["throughput_rps"] is not None
+            and level["throughput_rps"] < base["throughput_rps"] * (1 - tolerance)
+        ):
+            regressions.append(
+                f"c={c}: throughput {base['throughput_rps']} → {level['throughput_rps']} rps"
+            )
+
+        for node, dist in level["nodes"].items():
+            base_dist = base["nodes"].get(node)
+            if base_dist and _exceeds(dist["p95"], base_dist["p95"], tolerance):
+                regressions.append(
+                    f"c={c}: node {node} p95 {base_dist['p95']} → {dist['p95']} ms"
+                )
+
+        for key in ("errors", "retries", "repairs"):
+            # Per request, so runs with different iteration counts compare
+            if level[key] / level["requests"] > base[key] / base["requests"]:
+                regressions.append(f"c={c}: {key} {base[key]} → {level[key]}")
+
+        new_mismatches = set(level["mismatches"]) - set(base["mismatches"])
+        if new_mismatches:
+            regressions.append(f"c={c}: wrong answer type for {sorted(new_mismatches)}")
+
+    return regressions
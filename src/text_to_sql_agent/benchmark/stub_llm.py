@@ -0,0 +1,84 @@
+import asyncio
+import re
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_REPAIR_MARKER = "You are a SQL expert fixing a broken query"
+_SUMMARY_MARKER = "SQL Result Digest:"
+_USER_QUERY = re.compile(r"User query: (.*)")
+_QUESTION = re.compile(r"Question:\s*(.*?)\s*$", re.S)
+
+CLARIFICATION_REPLY = "Could you rephrase your question in terms of the data?"
+SUMMARY_REPLY = "Stub summary."
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic ChatModel for offline benchmarks.
+
+    Answers generation / repair prompts with canned SQL looked up by
+    question, summaries and clarifications with fixed text, after an
+    optional artificial latency. Reports token usage like a provider
+    so prompt_usage metadata is populated.
+    """
+
+    responses: dict[str, dict[str, Any]]
+    latency_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    # --------------------------------------------------------
+    # Prompt → canned reply
+    # --------------------------------------------------------
+    def _entry(self, question: str) -> dict[str, Any]:
+        return self.responses.get(question.strip(), {})
+
+    def _reply(self, messages) -> str:
+        text = messages[-1].content
+
+        if _SUMMARY_MARKER in text:
+            return SUMMARY_REPLY
+
+        if text.startswith(_REPAIR_MARKER):
+            match = _USER_QUERY.search(text)
+            entry = self._entry(match.group(1)) if match else {}
+            return entry.get("repair_sql") or entry.get("sql") or "SELECT 1"
+
+        match = _QUESTION.search(text)
+        if match:
+            return self._entry(match.group(1)).get("sql") or "SELECT 1"
+
+        return CLARIFICATION_REPLY
+
+    def _result(self, messages) -> ChatResult:
+        content = self._reply(messages)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._result(messages)
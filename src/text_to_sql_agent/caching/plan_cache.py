@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from text_to_sql_agent.config import settings
+from text_to_sql_agent.caching.result_cache import canonicalize_sql
+from text_to_sql_agent.sql_tools.query_plan import QueryPlan
+
+
+def _plan_key(sql: str, database) -> tuple[str, str, str]:
+    # Cost depends on each database's table sizes → one entry per
+    # database file, even when tenants share a schema
+    return (
+        canonicalize_sql(sql, keep_column_names=False),
+        str(database.path),
+        database.fingerprint,
+    )
+
+
+class PlanCache:
+    """
+    Bounded LRU of parsed query plans.
+
+    Keyed by (canonical SQL, database file, schema fingerprint), so
+    reformatted or re-aliased SQL reuses the plan instead of running
+    EXPLAIN again.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str, str], QueryPlan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sql: str, database) -> QueryPlan | None:
+        key = _plan_key(sql, database)
+
+        with self._lock:
+            plan = self._entries.get(key)
+
+            if plan is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return plan
+
+    def peek(self, sql: str, database) -> QueryPlan | None:
+        """
+        get() without counting or reordering (for reporting).
+        """
+        with self._lock:
+            return self._entries.get(_plan_key(sql, database))
+
+    def put(self, sql: str, database, plan: QueryPlan) -> None:
+        key = _plan_key(sql, database)
+
+        with self._lock:
+            self._entries[key] = plan
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_plan_cache() -> PlanCache | None:
+    """
+    Process-wide plan cache built from settings
+    (None when PLAN_GATE is "off").
+    """
+    if settings.plan_gate == "off":
+        return None
+    return PlanCache(settings.plan_cache_max_entries)
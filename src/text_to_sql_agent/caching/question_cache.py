@@ -0,0 +1,285 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from text_to_sql_agent.config import settings
+
+
+# ============================================================
+# Question normalization
+# ============================================================
+# Comparison, sign and percent symbols change what is asked → kept as tokens
+_OPERATOR = re.compile(r"<=|>=|<>|!=|==|[<>=!%-]")
+# Any other punctuation, except a decimal point
+_PUNCTUATION = re.compile(r"(?!(?<=\d)\.(?=\d))[^\w\s<>=!%-]")
+_TRAILING = re.compile(r"[\s.!?;:,]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(query: str) -> str:
+    """
+    Normalize a user question for cache lookup.
+
+    Case, trailing punctuation, quotes / commas and repeated whitespace
+    are not meaningful for SQL generation, so they are removed.
+    Operators (< > = ! - %) and decimal points are kept: "total > 10"
+    and "total < 10" are different questions.
+    """
+    q = _TRAILING.sub("", (query or "").lower())
+    q = _PUNCTUATION.sub(" ", q)
+    q = _OPERATOR.sub(lambda m: f" {m.group(0)} ", q)
+    return _WHITESPACE.sub(" ", q).strip()
+
+
+def build_cache_key(
+    user_query: str,
+    schema_fingerprint: str | None,
+    default_recent_limit: int | None,
+    default_popular_limit: int | None,
+) -> str:
+    """
+    Build a deterministic cache key.
+
+    The schema fingerprint and default limits are part of the key,
+    because the same question yields different SQL when they change.
+    """
+    payload = [
+        normalize_question(user_query),
+        schema_fingerprint,
+        default_recent_limit,
+        default_popular_limit,
+    ]
+    raw = json.dumps(payload)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# ============================================================
+# Backends
+# ============================================================
+class QuestionCacheBackend(ABC):
+    """
+    Storage interface for cached question → SQL entries.
+    Backends own eviction (LRU + TTL).
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> str | None:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, sql: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class InMemoryQuestionCache(QuestionCacheBackend):
+    """
+    In-process LRU dictionary with per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            sql, created_at = entry
+            if time.monotonic() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return sql
+
+    def put(self, key: str, sql: str) -> None:
+        with self._lock:
+            self._entries[key] = (sql, time.monotonic())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteQuestionCache(QuestionCacheBackend):
+    """
+    Local SQLite file backend.
+    Survives restarts and can be shared by workers on one host.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS question_sql_cache (
+                key TEXT PRIMARY KEY,
+                sql TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sql, created_at FROM question_sql_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            sql, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute(
+                    "DELETE FROM question_sql_cache WHERE key = ?", (key,)
+                )
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE question_sql_cache SET last_access = ? WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            return sql
+
+    def put(self, key: str, sql: str) -> None:
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO question_sql_cache "
+                "(key, sql, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, sql, now, now),
+            )
+
+            # LRU eviction beyond capacity
+            self._conn.execute(
+                """
+                DELETE FROM question_sql_cache
+                WHERE key IN (
+                    SELECT key FROM question_sql_cache
+                    ORDER BY last_access DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM question_sql_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM question_sql_cache"
+            ).fetchone()[0]
+
+
+# ============================================================
+# Cache front (keying + counters)
+# ============================================================
+class QuestionSQLCache:
+    """
+    Question → validated SQL cache placed in front of SQL generation.
+    """
+
+    def __init__(self, backend: QuestionCacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> str | None:
+        sql = self.backend.get(key)
+
+        with self._lock:
+            if sql is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return sql
+
+    def store(self, key: str, sql: str) -> None:
+        self.backend.put(key, sql)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.backend),
+        }
+
+
+def build_question_cache(
+    backend: str,
+    max_entries: int,
+    ttl_seconds: float,
+    path: str | None = None,
+) -> QuestionSQLCache | None:
+    """
+    Factory for the configured cache backend.
+
+    Returns:
+        QuestionSQLCache, or None when caching is disabled.
+    """
+    if backend == "off":
+        return None
+
+    if backend == "memory":
+        return QuestionSQLCache(InMemoryQuestionCache(max_entries, ttl_seconds))
+
+    if backend == "sqlite":
+        return QuestionSQLCache(SQLiteQuestionCache(path, max_entries, ttl_seconds))
+
+    # This should never happen because config validates it
+    raise RuntimeError(f"Unsupported SQL cache backend: {backend}")
+
+
+@lru_cache(maxsize=1)
+def get_question_cache() -> QuestionSQLCache | None:
+    """
+    Process-wide question cache built from settings.
+    """
+    return build_question_cache(
+        backend=settings.sql_cache_backend,
+        max_entries=settings.sql_cache_max_entries,
+        ttl_seconds=settings.sql_cache_ttl_seconds,
+        path=settings.sql_cache_path,
+    )
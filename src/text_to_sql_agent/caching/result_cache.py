@@ -0,0 +1,453 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.normalize_identifiers import normalize_identifiers
+from sqlalchemy import text
+
+from text_to_sql_agent.config import settings
+from text_to_sql_agent.sql_tools.sql_parsing import has_text_derived_columns
+from text_to_sql_agent.runtime.metrics import (
+    observe_result_cache,
+    set_result_cache_bytes,
+)
+
+
+# ============================================================
+# SQL canonicalization
+# ============================================================
+def _rename_table_aliases(tree: exp.Expression):
+    """
+    Rename table / subquery aliases to positional names (_t1, _t2, ...)
+    and rewrite the column qualifiers that use them.
+    """
+    mapping: dict[str, str] = {}
+
+    for node in tree.find_all(exp.Table, exp.Subquery):
+        alias = node.args.get("alias")
+        if alias is None or not alias.name:
+            continue
+
+        new_name = mapping.setdefault(alias.name, f"_t{len(mapping) + 1}")
+        alias.set("this", exp.to_identifier(new_name))
+
+    for column in tree.find_all(exp.Column):
+        if column.table in mapping:
+            column.set("table", exp.to_identifier(mapping[column.table]))
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_sql(sql: str, keep_column_names: bool = True) -> str:
+    """
+    Canonical text of a query, used as the result-cache key.
+
+    Identifier case, whitespace / keyword formatting and table alias
+    names are normalized. Output aliases are kept as written (they
+    name the result columns), and queries whose column names depend on
+    their exact text (unaliased expressions in the select list) are
+    returned unchanged — unless keep_column_names is False (plan cache:
+    column names do not change the plan).
+    """
+    try:
+        tree = sqlglot.parse_one(sql, read="sqlite")
+    except SqlglotError:
+        return sql.strip()
+
+    if tree is None:
+        return sql.strip()
+
+    if keep_column_names and has_text_derived_columns(tree):
+        return sql.strip()
+
+    output_aliases = [
+        s.args["alias"].copy() if isinstance(s, exp.Alias) else None
+        for s in tree.selects
+    ]
+
+    tree = normalize_identifiers(tree, dialect="sqlite")
+    _rename_table_aliases(tree)
+
+    for select, alias in zip(tree.selects, output_aliases):
+        if alias is not None:
+            select.set("alias", alias)
+
+    return tree.sql(dialect="sqlite")
+
+
+def result_cache_key(
+    database,
+    query: str,
+    max_rows: int,
+    params: dict | None = None,
+) -> str:
+    """
+    Key of one cached result: database, schema, canonical SQL, bind
+    parameters and row cap.
+    The data version is stored with the entry, not in the key, so a
+    write replaces stale entries instead of leaving them to age out.
+    """
+    payload = [
+        str(database.path),
+        database.fingerprint,
+        canonicalize_sql(query),
+        sorted((params or {}).items()),
+        max_rows,
+    ]
+    raw = json.dumps(payload)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# ============================================================
+# Data version
+# ============================================================
+def _file_version(path: Path) -> list:
+    """
+    mtime + size of the database file and its WAL. Every committed
+    write changes at least one of them.
+    """
+    version = []
+
+    for candidate in (path, Path(f"{path}-wal")):
+        try:
+            stat = os.stat(candidate)
+            version.append([stat.st_mtime_ns, stat.st_size])
+        except FileNotFoundError:
+            version.append(None)
+
+    return version
+
+
+def data_version(database) -> str:
+    """
+    Current data version of a served database.
+
+    RESULT_CACHE_VERSION_QUERY (optional) adds an application-level
+    probe, e.g. "SELECT max(updated_at) FROM audit_log".
+    """
+    version = _file_version(database.path)
+
+    if settings.result_cache_version_query:
+        with database.engine.connect() as conn:
+            version.append(
+                conn.execute(text(settings.result_cache_version_query)).scalar()
+            )
+
+    return json.dumps(version, default=str)
+
+
+async def adata_version(database) -> str:
+    """
+    Async variant of data_version (non-blocking probe query).
+    """
+    version = _file_version(database.path)
+
+    if settings.result_cache_version_query:
+        async with database.async_engine.connect() as conn:
+            result = await conn.execute(text(settings.result_cache_version_query))
+            version.append(result.scalar())
+
+    return json.dumps(version, default=str)
+
+
+# ============================================================
+# Storage tiers
+# ============================================================
+class CachedRows(list):
+    """
+    Result rows served from the result cache (not from the database).
+    """
+    pass
+
+
+class InMemoryResultStore:
+    """
+    In-process LRU of serialized (JSON) results, bounded in bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, version: str, payload: bytes) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[1])
+
+            self._entries[key] = (version, payload)
+            self.bytes += len(payload)
+
+            while self.bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResultStore:
+    """
+    Local SQLite file tier. Survives restarts and can be shared by
+    workers on one host; bounded in bytes (LRU).
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, payload FROM result_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self._conn.execute(
+                "UPDATE result_cache SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            return row[0], row[1]
+
+    def put(self, key: str, version: str, payload: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache "
+                "(key, version, payload, nbytes, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, version, payload, len(payload), time.time()),
+            )
+
+            # LRU eviction beyond the byte budget
+            self._conn.execute(
+                """
+                DELETE FROM result_cache
+                WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(nbytes) OVER (
+                            ORDER BY last_access DESC, key
+                        ) AS running_bytes
+                        FROM result_cache
+                    )
+                    WHERE running_bytes > ?
+                )
+                """,
+                (self.max_bytes,),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+            self._conn.commit()
+
+    @property
+    def bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(nbytes), 0) FROM result_cache"
+            ).fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM result_cache"
+            ).fetchone()[0]
+
+
+# ============================================================
+# Cache front (versions + counters)
+# ============================================================
+class ResultCache:
+    """
+    Canonical SQL → result rows, placed in front of SQL execution.
+
+    Entries carry the data version they were read at; a lookup under a
+    newer version drops the entry (counted as "stale") and misses.
+    Results are stored as JSON (never pickle: the disk file may be
+    shared), so callers never share row objects. Values JSON cannot
+    represent (bytes, Decimal, dates) come back as strings.
+    """
+
+    def __init__(
+        self,
+        memory: InMemoryResultStore,
+        disk: SQLiteResultStore | None = None,
+    ):
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+
+    def _count(self, outcome: str):
+        with self._lock:
+            if outcome == "memory_hit":
+                self.memory_hits += 1
+            elif outcome == "disk_hit":
+                self.disk_hits += 1
+            elif outcome == "stale":
+                self.stale += 1
+            else:
+                self.misses += 1
+
+        observe_result_cache(outcome)
+
+    def lookup(self, key: str, version: str) -> CachedRows | None:
+        stale = False
+
+        for outcome, tier in (("memory_hit", self.memory), ("disk_hit", self.disk)):
+            if tier is None:
+                continue
+
+            entry = tier.get(key)
+            if entry is None:
+                continue
+
+            if entry[0] != version:
+                # Written since it was cached
+                tier.delete(key)
+                stale = True
+                continue
+
+            try:
+                rows = json.loads(entry[1])
+            except ValueError:
+                # Unreadable payload (e.g. written by an older format)
+                tier.delete(key)
+                continue
+
+            if tier is self.disk:
+                self.memory.put(key, version, entry[1])
+
+            self._count(outcome)
+            return CachedRows(rows)
+
+        self._count("stale" if stale else "miss")
+        return None
+
+    def store(self, key: str, version: str, rows) -> None:
+        payload = json.dumps(
+            [_row_dict(row) for row in rows], default=str
+        ).encode()
+
+        # Never let one result flush the whole memory tier
+        if len(payload) <= self.memory.max_bytes:
+            self.memory.put(key, version, payload)
+
+        if self.disk is not None and len(payload) <= self.disk.max_bytes:
+            self.disk.put(key, version, payload)
+
+        self._update_gauges()
+
+    def _update_gauges(self):
+        set_result_cache_bytes("memory", self.memory.bytes)
+        if self.disk is not None:
+            set_result_cache_bytes("disk", self.disk.bytes)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        self._update_gauges()
+
+    def stats(self) -> dict:
+        stats = {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "entries": len(self.memory),
+            "bytes": self.memory.bytes,
+        }
+
+        if self.disk is not None:
+            stats["disk_entries"] = len(self.disk)
+            stats["disk_bytes"] = self.disk.bytes
+
+        return stats
+
+
+def _row_dict(row) -> dict:
+    if isinstance(row, dict):
+        return row
+    return dict(row._mapping)
+
+
+def build_result_cache(
+    max_bytes: int,
+    disk_path: str | None = None,
+    disk_max_bytes: int = 0,
+) -> ResultCache | None:
+    """
+    Factory for the result cache.
+
+    Returns:
+        ResultCache, or None when the memory budget is 0 (disabled).
+    """
+    if max_bytes <= 0:
+        return None
+
+    disk = SQLiteResultStore(disk_path, disk_max_bytes) if disk_path else None
+    return ResultCache(InMemoryResultStore(max_bytes), disk)
+
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache | None:
+    """
+    Process-wide result cache built from settings.
+    """
+    return build_result_cache(
+        max_bytes=settings.result_cache_max_bytes,
+        disk_path=settings.result_cache_disk_path,
+        disk_max_bytes=settings.result_cache_disk_max_bytes,
+    )
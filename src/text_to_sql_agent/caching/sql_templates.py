@@ -0,0 +1,315 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+from sqlglot import exp, parse_one
+from sqlglot.errors import SqlglotError
+
+from text_to_sql_agent.config import settings
+from text_to_sql_agent.caching.question_cache import normalize_question
+from text_to_sql_agent.sql_tools.sql_parsing import has_text_derived_columns
+
+
+# ============================================================
+# Question shape (skeleton + literal slots)
+# ============================================================
+# Quoted text, or a number not glued to a word ("top 5", "in 2011",
+# "above -5"; a minus right after a word is a hyphen, not a sign)
+_SLOT = re.compile(
+    r"(?<!\w)'([^']{1,100})'(?!\w)"
+    r"|\"([^\"]{1,100})\""
+    r"|(?<![\w.])((?:(?<![\w-])-)?\d+(?:\.\d+)?)(?!\w|\.\d)"
+)
+_YEAR = re.compile(r"^(19|20)\d\d$")
+_YEAR_IN_TEXT = re.compile(r"(?<!\d)(19|20)\d\d(?!\d)")
+
+
+@dataclass(frozen=True)
+class QuestionShape:
+    """
+    A question with its literals lifted out.
+
+    skeleton: Normalized question, literals replaced by slot markers
+        and schema-entity mentions aligned to their singular form.
+    slots: (kind, value) per literal, in question order.
+        kind is "year", "number" or "text".
+    """
+    skeleton: str
+    slots: tuple[tuple[str, str], ...]
+
+    @property
+    def kinds(self) -> tuple[str, ...]:
+        return tuple(kind for kind, _ in self.slots)
+
+
+def _slot_kind(quoted: str | None, number: str | None) -> str:
+    if quoted is not None:
+        return "text"
+    return "year" if _YEAR.match(number) else "number"
+
+
+def question_shape(query: str, schema_entities: Iterable[str] = ()) -> QuestionShape:
+    """
+    Lift numbers, years and quoted text out of a question.
+
+    "Top 5 artists by sales" and "top 10 artist by sales" share one
+    skeleton ("top __number__ artist by sales"), with slots 5 and 10.
+    """
+    slots: list[tuple[str, str]] = []
+
+    def _lift(match) -> str:
+        quoted = match.group(1) if match.group(1) is not None else match.group(2)
+        number = match.group(3)
+        kind = _slot_kind(quoted, number)
+        slots.append((kind, quoted if quoted is not None else number))
+        return f" __{kind}__ "
+
+    skeleton = normalize_question(_SLOT.sub(_lift, query or ""))
+
+    entities = schema_entities if isinstance(schema_entities, (set, frozenset)) else set(schema_entities)
+    tokens = [
+        token[:-1] if token.endswith("s") and token[:-1] in entities else token
+        for token in skeleton.split()
+    ]
+
+    return QuestionShape(skeleton=" ".join(tokens), slots=tuple(slots))
+
+
+def build_template_key(
+    shape: QuestionShape,
+    schema_fingerprint: str | None,
+    default_recent_limit: int | None,
+    default_popular_limit: int | None,
+) -> str:
+    """
+    Deterministic template key (same inputs as the question cache key,
+    with the skeleton in place of the question).
+    """
+    payload = [
+        shape.skeleton,
+        schema_fingerprint,
+        default_recent_limit,
+        default_popular_limit,
+    ]
+    raw = json.dumps(payload)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# ============================================================
+# Templates (validated SQL with literals as parameters)
+# ============================================================
+@dataclass(frozen=True)
+class SqlTemplate:
+    """
+    Parameterized SQL plus how to bind it from a question's slots.
+
+    bindings: (param name, slot index, prefix, suffix, value type) —
+        value type is "text", "int", "count" (LIMIT / OFFSET: no sign)
+        or "float"; a text binding renders
+        prefix + value + suffix (e.g. a LIKE pattern or a date built
+        around a year).
+    """
+    sql: str
+    kinds: tuple[str, ...]
+    bindings: tuple[tuple[str, int, str, str, str], ...]
+
+    def bind(self, shape: QuestionShape) -> dict | None:
+        if shape.kinds != self.kinds:
+            return None
+
+        params = {}
+
+        for name, index, prefix, suffix, value_type in self.bindings:
+            value = shape.slots[index][1]
+
+            if value_type == "text":
+                params[name] = f"{prefix}{value}{suffix}"
+            elif value_type in ("int", "count"):
+                # A decimal does not fit where an int did; a negative
+                # LIMIT would mean "no limit"
+                digits = value if value_type == "count" else value.lstrip("-")
+                if not digits.isdigit():
+                    return None
+                params[name] = int(value)
+            else:
+                params[name] = float(value)
+
+        return params
+
+
+def _literal_node(literal: exp.Literal) -> exp.Expression:
+    """
+    The node a slot replaces: -5 parses as Neg(5), and the sign belongs
+    to the slot value.
+    """
+    parent = literal.parent
+    return parent if isinstance(parent, exp.Neg) and not literal.is_string else literal
+
+
+def _literal_binding(literal: exp.Literal, kind: str, value: str):
+    """
+    (prefix, suffix, value type) when this SQL literal carries the slot
+    value, else None.
+    """
+    if not literal.is_string:
+        if kind == "text":
+            return None
+        number = literal.this
+        if _literal_node(literal) is not literal:
+            number = f"-{number}"
+        try:
+            if float(number) != float(value):
+                return None
+        except ValueError:
+            return None
+        return "", "", "int" if literal.is_int else "float"
+
+    text = literal.this
+
+    if kind == "number":
+        return ("", "", "text") if text == value else None
+
+    if kind == "year":
+        # '2011', '2011-01-01'
+        if text == value or text.startswith(f"{value}-"):
+            return "", text[len(value):], "text"
+        return None
+
+    # Quoted text: exact or embedded (LIKE '%AC/DC%')
+    position = text.find(value)
+    if position == -1:
+        return None
+    return text[:position], text[position + len(value):], "text"
+
+
+def lift_template(sql: str, shape: QuestionShape) -> SqlTemplate | None:
+    """
+    Turn validated SQL into a template for this question shape.
+
+    Every slot must map to exactly ONE literal and slot values must be
+    distinct; anything ambiguous returns None (no template), so a
+    template never binds a value into the wrong place. SQL whose column
+    names follow its text is skipped too (the template is re-generated
+    SQL and would rename those columns).
+    """
+    if not shape.slots:
+        return None
+
+    values = [value for _, value in shape.slots]
+    if len(set(values)) != len(values):
+        return None
+
+    try:
+        tree = parse_one(sql, read="sqlite")
+    except SqlglotError:
+        return None
+
+    if not isinstance(tree, exp.Query) or has_text_derived_columns(tree):
+        return None
+
+    literals = list(tree.find_all(exp.Literal))
+    matches = []
+
+    for index, (kind, value) in enumerate(shape.slots):
+        candidates = [
+            (literal, binding)
+            for literal in literals
+            if (binding := _literal_binding(literal, kind, value)) is not None
+        ]
+        if len(candidates) != 1:
+            return None
+        matches.append((index, *candidates[0]))
+
+    bound = {id(literal) for _, literal, _ in matches}
+    if len(bound) != len(matches):
+        return None
+
+    # A year may also hide in derived literals ('2012-01-01' as the end
+    # of "in 2011"); those would not follow the bound value
+    if "year" in shape.kinds and any(
+        id(literal) not in bound and _YEAR_IN_TEXT.search(literal.this)
+        for literal in literals
+    ):
+        return None
+
+    bindings = []
+
+    for index, literal, (prefix, suffix, value_type) in matches:
+        name = f"p{index}"
+        if value_type == "int" and literal.find_ancestor(exp.Limit, exp.Offset):
+            value_type = "count"
+        _literal_node(literal).replace(exp.Placeholder(this=name))
+        bindings.append((name, index, prefix, suffix, value_type))
+
+    return SqlTemplate(
+        sql=tree.sql(dialect="sqlite"),
+        kinds=shape.kinds,
+        bindings=tuple(bindings),
+    )
+
+
+# ============================================================
+# Template cache
+# ============================================================
+class SqlTemplateCache:
+    """
+    Bounded LRU of question skeleton → SqlTemplate.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, SqlTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, shape: QuestionShape) -> tuple[SqlTemplate, dict] | None:
+        """
+        (template, bound params), or None when no template fits.
+        """
+        with self._lock:
+            template = self._entries.get(key)
+            params = template.bind(shape) if template is not None else None
+
+            if params is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return template, params
+
+    def store(self, key: str, template: SqlTemplate) -> None:
+        with self._lock:
+            self._entries[key] = template
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_template_cache() -> SqlTemplateCache | None:
+    """
+    Process-wide template cache built from settings
+    (None when SQL_TEMPLATE_CACHE_MAX_ENTRIES is 0).
+    """
+    if settings.sql_template_cache_max_entries <= 0:
+        return None
+    return SqlTemplateCache(settings.sql_template_cache_max_entries)
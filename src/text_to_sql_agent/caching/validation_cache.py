@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from text_to_sql_agent.config import settings
+
+
+def _validation_key(sql: str, database) -> tuple[str, str, str]:
+    # Tenants sharing a schema still differ in data and size limits
+    return (sql, str(database.path), database.fingerprint)
+
+
+class ValidationCache:
+    """
+    Bounded LRU memo of validation verdicts.
+
+    Keyed by (SQL text, database file, schema fingerprint). Stores BOTH outcomes:
+    "VALID" and "INVALID: <reason>", so regenerated SQL that repeats
+    a known-bad query is rejected without re-parsing or re-EXPLAINing.
+    Callers only store deterministic verdicts (see sql_check_tool).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sql: str, database) -> str | None:
+        key = _validation_key(sql, database)
+
+        with self._lock:
+            verdict = self._entries.get(key)
+
+            if verdict is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return verdict
+
+    def put(self, sql: str, database, verdict: str) -> None:
+        key = _validation_key(sql, database)
+
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_validation_cache() -> ValidationCache:
+    """
+    Process-wide validation memo built from settings.
+    """
+    return ValidationCache(settings.validation_cache_max_entries)
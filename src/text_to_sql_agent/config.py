@@ -38,6 +38,172 @@ class Settings(BaseModel):
     env: str = os.getenv("ENV", "local")
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
 
+    # ------------------------------------------------------------
+    # Databases (registry)
+    # ------------------------------------------------------------
+    # extra databases: "sales=/data/sales.db,hr=/data/hr.db"
+    databases: str = os.getenv("DATABASES", "")
+    # optional directory: every <id>.db in it is servable by id
+    database_dir: str | None = os.getenv("DATABASE_DIR")
+    default_database_id: str = os.getenv("DEFAULT_DATABASE_ID", "chinook")
+    # engines + catalogs kept resident at once (LRU beyond this)
+    db_registry_max_resident: int = int(
+        os.getenv("DB_REGISTRY_MAX_RESIDENT", "16")
+    )
+
+    # ------------------------------------------------------------
+    # Database connection pool
+    # ------------------------------------------------------------
+    db_read_only: bool = os.getenv("DB_READ_ONLY", "true").lower() == "true"
+    db_immutable: bool = os.getenv("DB_IMMUTABLE", "false").lower() == "true"
+    # Pool and cache sizes are totals, split evenly between the
+    # databases the registry can keep open at once.
+    # sync pool sized for FastAPI's default worker threadpool (40)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "40"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # aiosqlite runs a thread per connection → small, no overflow
+    db_async_pool_size: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "8"))
+    db_mmap_size: int = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # negative → KiB (SQLite convention), i.e. 64 MiB per connection
+    # with a single database open
+    db_cache_size: int = int(os.getenv("DB_CACHE_SIZE", "-65536"))
+
+    # ------------------------------------------------------------
+    # Query execution budget (0 disables)
+    # ------------------------------------------------------------
+    sql_execution_timeout_seconds: float = float(
+        os.getenv("SQL_EXECUTION_TIMEOUT_SECONDS", "10")
+    )
+
+    # ------------------------------------------------------------
+    # Batch endpoint (/chat/batch)
+    # ------------------------------------------------------------
+    batch_max_queries: int = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+    batch_max_concurrency: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    # concurrent generations coalesced into one ChatModel.abatch call
+    llm_batch_max_size: int = int(os.getenv("LLM_BATCH_MAX_SIZE", "16"))
+    llm_batch_max_wait_ms: float = float(os.getenv("LLM_BATCH_MAX_WAIT_MS", "20"))
+
+    # ------------------------------------------------------------
+    # Relevant-subschema retrieval
+    # ------------------------------------------------------------
+    # prune only schemas with at least this many tables (0 → always)
+    schema_retrieval_min_tables: int = int(
+        os.getenv("SCHEMA_RETRIEVAL_MIN_TABLES", "50")
+    )
+    schema_retrieval_max_seeds: int = int(
+        os.getenv("SCHEMA_RETRIEVAL_MAX_SEEDS", "5")
+    )
+    # optional JSON {"table": "...", "table.column": "..."}
+    schema_descriptions_path: str | None = os.getenv("SCHEMA_DESCRIPTIONS_PATH")
+
+    # ------------------------------------------------------------
+    # Question → SQL cache
+    # ------------------------------------------------------------
+    sql_cache_backend: str = os.getenv("SQL_CACHE_BACKEND", "memory")
+    # allowed: "memory", "sqlite", "off"
+    sql_cache_max_entries: int = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "1024"))
+    sql_cache_ttl_seconds: float = float(
+        os.getenv("SQL_CACHE_TTL_SECONDS", "86400")
+    )
+    sql_cache_path: str = os.getenv(
+        "SQL_CACHE_PATH", str(ENV_PATH.parent / "question_sql_cache.db")
+    )
+
+    # ------------------------------------------------------------
+    # SQL template cache (question variants that differ in literals)
+    # ------------------------------------------------------------
+    # 0 → disabled
+    sql_template_cache_max_entries: int = int(
+        os.getenv("SQL_TEMPLATE_CACHE_MAX_ENTRIES", "1024")
+    )
+
+    # ------------------------------------------------------------
+    # Few-shot examples (successful question → SQL pairs)
+    # ------------------------------------------------------------
+    # examples injected per generation (0 → disabled)
+    few_shot_k: int = int(os.getenv("FEW_SHOT_K", "3"))
+    few_shot_min_similarity: float = float(
+        os.getenv("FEW_SHOT_MIN_SIMILARITY", "0.35")
+    )
+    # per schema fingerprint
+    few_shot_max_examples: int = int(os.getenv("FEW_SHOT_MAX_EXAMPLES", "2000"))
+    # SQLite file (empty → in-memory only)
+    few_shot_store_path: str = os.getenv(
+        "FEW_SHOT_STORE_PATH", str(ENV_PATH.parent / "few_shot_examples.db")
+    )
+
+    # ------------------------------------------------------------
+    # Speculative SQL generation
+    # ------------------------------------------------------------
+    # candidates generated + validated concurrently per attempt
+    # (1 → serial; capped at the number of prompt variations)
+    sql_speculative_candidates: int = int(
+        os.getenv("SQL_SPECULATIVE_CANDIDATES", "1")
+    )
+
+    # ------------------------------------------------------------
+    # Query result cache (canonical SQL + data version)
+    # ------------------------------------------------------------
+    # memory budget in bytes (0 → disabled)
+    result_cache_max_bytes: int = int(
+        os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    # optional on-disk tier (SQLite file)
+    result_cache_disk_path: str | None = os.getenv("RESULT_CACHE_DISK_PATH")
+    result_cache_disk_max_bytes: int = int(
+        os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024))
+    )
+    # optional scalar probe added to the file-based data version
+    result_cache_version_query: str | None = os.getenv("RESULT_CACHE_VERSION_QUERY")
+
+    # ------------------------------------------------------------
+    # Persisted schema snapshot (empty → always introspect)
+    # ------------------------------------------------------------
+    schema_snapshot_path: str = os.getenv(
+        "SCHEMA_SNAPSHOT_PATH", str(ENV_PATH.parent / "schema_snapshot.json")
+    )
+
+    # ------------------------------------------------------------
+    # SQL validation memo
+    # ------------------------------------------------------------
+    validation_cache_max_entries: int = int(
+        os.getenv("VALIDATION_CACHE_MAX_ENTRIES", "4096")
+    )
+
+    # ------------------------------------------------------------
+    # Query plan gate (parsed EXPLAIN QUERY PLAN + cost model)
+    # ------------------------------------------------------------
+    # "reject" (invalid → repair), "flag" (metadata only) or "off"
+    plan_gate: str = os.getenv("PLAN_GATE", "reject")
+    # unbounded full scan of a fact table at least this large
+    plan_max_scan_rows: int = int(os.getenv("PLAN_MAX_SCAN_ROWS", "1000000"))
+    # estimated row visits (nested loops multiply)
+    plan_max_cost: int = int(os.getenv("PLAN_MAX_COST", "100000000"))
+    plan_cache_max_entries: int = int(
+        os.getenv("PLAN_CACHE_MAX_ENTRIES", "4096")
+    )
+
+    # ------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------
+    stream_chunk_rows: int = int(os.getenv("STREAM_CHUNK_ROWS", "100"))
+
+    # ------------------------------------------------------------
+    # Post-execution summary
+    # ------------------------------------------------------------
+    summary_mode: str = os.getenv("SUMMARY_MODE", "inline")
+    # allowed: "off", "inline", "deferred", "concurrent"
+    summary_workers: int = int(os.getenv("SUMMARY_WORKERS", "8"))
+    # hard cap on result-digest tokens sent to the summary LLM
+    summary_token_budget: int = int(os.getenv("SUMMARY_TOKEN_BUDGET", "800"))
+    summary_store_max_entries: int = int(
+        os.getenv("SUMMARY_STORE_MAX_ENTRIES", "1024")
+    )
+    summary_store_ttl_seconds: float = float(
+        os.getenv("SUMMARY_STORE_TTL_SECONDS", "600")
+    )
+
     # ------------------------------------------------------------
     # Validation
     # ------------------------------------------------------------
@@ -51,6 +217,36 @@ class Settings(BaseModel):
             )
         return v
 
+    @field_validator("sql_cache_backend")
+    @classmethod
+    def validate_sql_cache_backend(cls, v: str):
+        allowed = {"memory", "sqlite", "off"}
+        if v not in allowed:
+            raise ValueError(
+                f"Invalid SQL_CACHE_BACKEND '{v}'. Must be one of {allowed}"
+            )
+        return v
+
+    @field_validator("summary_mode")
+    @classmethod
+    def validate_summary_mode(cls, v: str):
+        allowed = {"off", "inline", "deferred", "concurrent"}
+        if v not in allowed:
+            raise ValueError(
+                f"Invalid SUMMARY_MODE '{v}'. Must be one of {allowed}"
+            )
+        return v
+
+    @field_validator("plan_gate")
+    @classmethod
+    def validate_plan_gate(cls, v: str):
+        allowed = {"reject", "flag", "off"}
+        if v not in allowed:
+            raise ValueError(
+                f"Invalid PLAN_GATE '{v}'. Must be one of {allowed}"
+            )
+        return v
+
     @field_validator("openai_api_key")
     @classmethod
     def validate_openai_key(cls, v, info):
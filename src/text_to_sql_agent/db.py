@@ -1,7 +1,121 @@
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from text_to_sql_agent.config import settings
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DB_URL = BASE_DIR / "src" / "text_to_sql_agent" / "chinook.db"
 
-engine = create_engine(f"sqlite:///{DB_URL}")
+
+def _sqlite_url(db_path: Path, driver: str) -> str:
+    """
+    Build a SQLite URI-mode URL (read-only / immutable when configured).
+    """
+    params = []
+
+    if settings.db_read_only:
+        params.append("mode=ro")
+
+    if settings.db_immutable:
+        # Only safe when NOTHING writes the file while we serve it
+        params.append("immutable=1")
+
+    params.append("uri=true")
+
+    return f"sqlite+{driver}:///file:{db_path}?{'&'.join(params)}"
+
+
+def _connection_pragmas(share: int = 1) -> list[str]:
+    pragmas = [
+        f"PRAGMA mmap_size = {settings.db_mmap_size}",
+        # The cache budget is split like the pools (negative stays KiB)
+        f"PRAGMA cache_size = {int(settings.db_cache_size / share) or -1}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+
+    if settings.db_read_only:
+        pragmas.insert(0, "PRAGMA query_only = ON")
+
+    return pragmas
+
+
+def _pragma_listener(share: int):
+    """
+    Connect listener: per-connection setup, run once when the pool
+    opens a connection.
+    """
+    pragmas = _connection_pragmas(share)
+
+    def apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return apply
+
+
+def build_engine(db_path: Path = DB_URL, share: int = 1):
+    """
+    Factory for the tuned, pooled SQLite engine.
+
+    Args:
+        db_path: SQLite database file.
+        share: databases open at once; pool and cache settings are
+            totals split between them.
+
+    Returns:
+        SQLAlchemy Engine.
+    """
+    engine = create_engine(
+        _sqlite_url(db_path, "pysqlite"),
+        pool_size=max(settings.db_pool_size // share, 1),
+        max_overflow=settings.db_max_overflow // share,
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine, "connect", _pragma_listener(share))
+    return engine
+
+
+def build_async_engine(db_path: Path = DB_URL, share: int = 1):
+    """
+    Async twin of build_engine (aiosqlite driver).
+
+    Sized separately and without overflow: every aiosqlite
+    connection runs on its own thread.
+    """
+    engine = create_async_engine(
+        _sqlite_url(db_path, "aiosqlite"),
+        pool_size=max(settings.db_async_pool_size // share, 1),
+        max_overflow=0,
+    )
+    event.listen(engine.sync_engine, "connect", _pragma_listener(share))
+    return engine
+
+
+def pool_stats(engine) -> dict:
+    """
+    Snapshot of connection pool usage.
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+def __getattr__(name: str):
+    # Legacy `engine` / `async_engine`: the default database's engines,
+    # owned by the database registry (created on first use)
+    if name in ("engine", "async_engine"):
+        from text_to_sql_agent.db_registry import get_database_registry
+
+        return getattr(get_database_registry().get(), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
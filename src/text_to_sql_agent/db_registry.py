@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from text_to_sql_agent.config import settings
+from text_to_sql_agent.db import DB_URL, build_async_engine, build_engine, pool_stats
+from text_to_sql_agent.schema_analysis import estimate_table_rows
+from text_to_sql_agent.schema_catalog import SchemaCatalog, get_schema_catalog
+from text_to_sql_agent.schema_snapshot import load_database_schema
+
+logger = logging.getLogger(__name__)
+
+# Async engine disposals in flight (a bare task may be collected early)
+_DISPOSALS: set[asyncio.Task] = set()
+
+# Ids double as file names under DATABASE_DIR → no path separators
+_DATABASE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UnknownDatabaseError(KeyError):
+    """
+    Raised when a database id does not resolve to a database file.
+    """
+    pass
+
+
+class DatabaseHandle:
+    """
+    One resident database: pooled engines plus its schema,
+    loaded on first use (snapshot or introspection).
+    """
+
+    def __init__(
+        self,
+        database_id: str,
+        path: Path,
+        snapshot_path: str | None,
+        share: int = 1,
+    ):
+        self.database_id = database_id
+        self.path = path
+        self.snapshot_path = snapshot_path
+
+        self.engine = build_engine(path, share)
+        self.async_engine = build_async_engine(path, share)
+
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.requests = 0
+        self.pins = 0   # requests in flight (never evicted while > 0)
+
+        self._schema: tuple[dict, dict, str] | None = None
+        self._catalog: SchemaCatalog | None = None
+        self._table_rows: dict[str, int] | None = None
+        self._lock = threading.Lock()
+
+    def schema(self) -> tuple[dict, dict, str]:
+        """
+        (tables, foreign_keys, fingerprint), loaded once per residency.
+        """
+        if self._schema is None:
+            with self._lock:
+                if self._schema is None:
+                    self._schema = load_database_schema(
+                        self.engine, self.path, self.snapshot_path
+                    )
+        return self._schema
+
+    @property
+    def catalog(self) -> SchemaCatalog:
+        # Held here: the catalog cache only keeps catalogs in use alive
+        if self._catalog is None:
+            self._catalog = get_schema_catalog(*self.schema())
+        return self._catalog
+
+    @property
+    def table_rows(self) -> dict[str, int]:
+        """
+        Estimated rows per table (plan cost model), read once per
+        residency (warmed with the catalog at startup; async callers
+        read it off the event loop).
+        """
+        if self._table_rows is None:
+            self._table_rows = estimate_table_rows(self.engine)
+        return self._table_rows
+
+    @property
+    def fingerprint(self) -> str:
+        return self.schema()[2]
+
+    def dispose(self):
+        """
+        Release pooled connections. Connections still checked out by
+        in-flight requests are closed when they are returned.
+        """
+        self.engine.dispose()
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        try:
+            if loop is not None:
+                task = loop.create_task(self.async_engine.dispose())
+                _DISPOSALS.add(task)
+                task.add_done_callback(self._disposed)
+            else:
+                asyncio.run(self.async_engine.dispose())
+        except Exception as e:
+            logger.warning(f"Failed to dispose async engine for {self.database_id}: {e}")
+
+    def _disposed(self, task: asyncio.Task):
+        _DISPOSALS.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                f"Failed to dispose async engine for {self.database_id}: "
+                f"{task.exception()}"
+            )
+
+    def stats(self) -> dict:
+        schema = self._schema
+        return {
+            "path": str(self.path),
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+            "requests": self.requests,
+            "pins": self.pins,
+            "schema_loaded": schema is not None,
+            "tables": len(schema[0]) if schema else None,
+            "fingerprint": schema[2][:12] if schema else None,
+            "sync_pool": pool_stats(self.engine),
+            "async_pool": pool_stats(self.async_engine),
+        }
+
+
+class DatabaseRegistry:
+    """
+    Resolves database ids to lazily created DatabaseHandles.
+
+    At most max_resident handles are kept; the least recently used
+    one is disposed when a new database is opened beyond that.
+    Handles pinned by in-flight requests (acquire / release) are never
+    evicted, so the registry may briefly exceed max_resident.
+    """
+
+    def __init__(
+        self,
+        databases: dict[str, Path],
+        default_database_id: str,
+        max_resident: int,
+        database_dir: Path | None = None,
+    ):
+        self.databases = dict(databases)
+        self.default_database_id = default_database_id
+        self.max_resident = max(max_resident, 1)
+        self.database_dir = database_dir
+
+        # Databases open at once: pool / cache totals are split by this
+        self.share = (
+            self.max_resident
+            if database_dir is not None
+            else max(min(self.max_resident, len(self.databases)), 1)
+        )
+
+        self._handles: OrderedDict[str, DatabaseHandle] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.loads = 0
+        self.evictions = 0
+
+    # --------------------------------------------------------
+    # Resolution
+    # --------------------------------------------------------
+    def resolve_path(self, database_id: str) -> Path:
+        if database_id in self.databases:
+            return self.databases[database_id]
+
+        if self.database_dir is not None and _DATABASE_ID.match(database_id):
+            candidate = self.database_dir / f"{database_id}.db"
+            if candidate.is_file():
+                return candidate
+
+        raise UnknownDatabaseError(database_id)
+
+    def snapshot_path(self, database_id: str) -> str | None:
+        base = settings.schema_snapshot_path
+        if not base or database_id == self.default_database_id:
+            return base
+
+        path = Path(base)
+        return str(path.with_name(f"{path.stem}.{database_id}{path.suffix}"))
+
+    def _evict_overflow(
+        self, keep: DatabaseHandle | None = None
+    ) -> list[DatabaseHandle]:
+        """
+        Pop least recently used, unpinned handles beyond max_resident,
+        never `keep` (caller holds the lock).
+        """
+        evicted = []
+        idle = [
+            h for h in self._handles.values() if h.pins == 0 and h is not keep
+        ]
+
+        while len(self._handles) > self.max_resident and idle:
+            handle = idle.pop(0)
+            del self._handles[handle.database_id]
+            evicted.append(handle)
+
+        self.evictions += len(evicted)
+        return evicted
+
+    def _dispose(self, evicted: list[DatabaseHandle]):
+        # Outside the lock: disposing may wait on the database
+        for old in evicted:
+            logger.info(f"Evicting database {old.database_id}")
+            old.dispose()
+
+    def get(
+        self, database_id: str | None = None, pin: bool = False
+    ) -> DatabaseHandle:
+        database_id = database_id or self.default_database_id
+
+        with self._lock:
+            handle = self._handles.get(database_id)
+
+            if handle is not None:
+                self._handles.move_to_end(database_id)
+            else:
+                handle = DatabaseHandle(
+                    database_id,
+                    self.resolve_path(database_id),
+                    self.snapshot_path(database_id),
+                    self.share,
+                )
+                self._handles[database_id] = handle
+                self.loads += 1
+
+            if pin:
+                handle.pins += 1
+                handle.requests += 1
+
+            handle.last_used = time.time()
+            evicted = self._evict_overflow(keep=handle)
+
+        self._dispose(evicted)
+        return handle
+
+    def acquire(self, database_id: str | None = None) -> DatabaseHandle:
+        """
+        get() for a new request: counted in per-database stats and
+        pinned (kept resident) until release().
+        """
+        return self.get(database_id, pin=True)
+
+    def release(self, handle: DatabaseHandle):
+        """
+        End of the request that acquired handle; evicts what pinning
+        kept resident beyond max_resident.
+        """
+        with self._lock:
+            handle.pins = max(handle.pins - 1, 0)
+            evicted = self._evict_overflow()
+
+        self._dispose(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            handles = list(self._handles.values())
+
+        return {
+            "default_database_id": self.default_database_id,
+            "resident": len(handles),
+            "max_resident": self.max_resident,
+            "pool_share": self.share,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "databases": {h.database_id: h.stats() for h in handles},
+        }
+
+
+def _parse_databases(raw: str) -> dict[str, Path]:
+    databases = {}
+
+    for entry in filter(None, (part.strip() for part in raw.split(","))):
+        database_id, _, path = entry.partition("=")
+        if not _DATABASE_ID.match(database_id.strip()) or not path.strip():
+            raise ValueError(f"Invalid DATABASES entry '{entry}' (expected id=path)")
+        databases[database_id.strip()] = Path(path.strip())
+
+    return databases
+
+
+@lru_cache(maxsize=1)
+def get_database_registry() -> DatabaseRegistry:
+    """
+    Process-wide database registry built from settings.
+    The bundled chinook.db is always available as "chinook".
+    """
+    databases = {"chinook": DB_URL, **_parse_databases(settings.databases)}
+
+    return DatabaseRegistry(
+        databases=databases,
+        default_database_id=settings.default_database_id,
+        max_resident=settings.db_registry_max_resident,
+        database_dir=Path(settings.database_dir) if settings.database_dir else None,
+    )
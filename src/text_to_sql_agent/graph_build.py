@@ -3,19 +3,34 @@ from text_to_sql_agent.graph_state import GraphState
 
 from text_to_sql_agent.grounding.grounding_router import routing_node
 from text_to_sql_agent.graph_nodes import (
+    lookup_cached_sql,
+    alookup_cached_sql,
+    retrieve_schema,
+    aretrieve_schema,
+    retrieve_examples,
+    aretrieve_examples,
     generate_sql_node,
     repair_sql_node,
     validate_sql,
     execute_sql,
     final_response_node,
+    arepair_sql_node,
+    avalidate_sql,
+    aexecute_sql,
+    afinal_response_node,
 )
 from text_to_sql_agent.graph_policy import retry_decision
+from text_to_sql_agent.runtime.instrumentation import instrument_node
 
 
 def build_graph(agent):
     """
     Build and compile the LangGraph execution graph
     with bounded retry, repair, and HITL logic.
+
+    Every blocking node carries an async twin, so the same graph
+    supports both invoke() and ainvoke(). Every node is timed
+    (runtime.instrumentation).
     """
 
     graph = StateGraph(GraphState)
@@ -23,12 +38,38 @@ def build_graph(agent):
     # ------------------------------------------------------------
     # Nodes
     # ------------------------------------------------------------
-    graph.add_node("route", routing_node())
-    graph.add_node("generate_sql", generate_sql_node(agent))
-    graph.add_node("validate_sql", validate_sql)
-    graph.add_node("repair_sql", repair_sql_node)
-    graph.add_node("execute_sql", execute_sql)
-    graph.add_node("final_response", final_response_node)
+    graph.add_node("route", instrument_node("route", routing_node()))
+    graph.add_node(
+        "lookup_cached_sql", instrument_node(
+            "lookup_cached_sql", lookup_cached_sql, alookup_cached_sql
+        ),
+    )
+    graph.add_node(
+        "retrieve_schema", instrument_node(
+            "retrieve_schema", retrieve_schema, aretrieve_schema
+        ),
+    )
+    graph.add_node(
+        "retrieve_examples", instrument_node(
+            "retrieve_examples", retrieve_examples, aretrieve_examples
+        ),
+    )
+    graph.add_node(
+        "generate_sql", instrument_node("generate_sql", generate_sql_node(agent))
+    )
+    graph.add_node(
+        "validate_sql", instrument_node("validate_sql", validate_sql, avalidate_sql)
+    )
+    graph.add_node(
+        "repair_sql", instrument_node("repair_sql", repair_sql_node, arepair_sql_node)
+    )
+    graph.add_node(
+        "execute_sql", instrument_node("execute_sql", execute_sql, aexecute_sql)
+    )
+    graph.add_node(
+        "final_response",
+        instrument_node("final_response", final_response_node, afinal_response_node),
+    )
 
     # ------------------------------------------------------------
     # Entry point
@@ -42,11 +83,33 @@ def build_graph(agent):
         "route",
         lambda state: state.execution_mode,
         {
-            "SQL_REQUIRED": "generate_sql",
+            "SQL_REQUIRED": "lookup_cached_sql",
             "NON_SQL_RESPONSE": "final_response",
         },
     )
 
+    # ------------------------------------------------------------
+    # Question cache (hit → execute previously validated SQL)
+    # ------------------------------------------------------------
+    graph.add_conditional_edges(
+        "lookup_cached_sql",
+        lambda state: (
+            "execute_sql"
+            if state.sql_cache_hit or state.sql_template_hit
+            else "retrieve_schema"
+        ),
+        {
+            "execute_sql": "execute_sql",
+            "retrieve_schema": "retrieve_schema",
+        },
+    )
+
+    # ------------------------------------------------------------
+    # Relevant-subschema selection (once per request)
+    # ------------------------------------------------------------
+    graph.add_edge("retrieve_schema", "retrieve_examples")
+    graph.add_edge("retrieve_examples", "generate_sql")
+
     # ------------------------------------------------------------
     # SQL generation & validation flow
     # ------------------------------------------------------------
@@ -1,5 +1,13 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import as_completed
+from functools import lru_cache
+
 from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langchain_core.messages import SystemMessage, HumanMessage
+from langgraph.config import get_stream_writer
 
 from text_to_sql_agent.result_processing.output_classifier import classify_output
 from text_to_sql_agent.sql_tools.normalization import normalize_sql
@@ -10,169 +18,610 @@ from text_to_sql_agent.utils.load_markdown import load_markdown_content
 from text_to_sql_agent.sql_tools.sql_tools import (
     sql_check_tool,
     sql_exec_tool,
+    asql_check_tool,
+    asql_exec_tool,
+    issue_validation_token,
+    query_plan_summary,
+    ExecutionTimeout,
+    MAX_ROWS,
 )
 
-from text_to_sql_agent.grounding.query_enricher import enrich_for_sql
+from text_to_sql_agent.grounding.query_enricher import (
+    build_prompt_prefix,
+    enrich_for_sql,
+)
+from text_to_sql_agent.utils.llm_usage import extract_prompt_usage
+from text_to_sql_agent.runtime.metrics import (
+    observe_db_execution,
+    observe_few_shot,
+    observe_first_pass_validation,
+    observe_llm_usage,
+    observe_sql_candidates,
+)
 from text_to_sql_agent.errors.error_formatter import format_error_message
-from text_to_sql_agent.runtime_bootstrap import SCHEMA_FINGERPRINT
+from text_to_sql_agent.runtime_bootstrap import get_runtime_catalog, get_schema_fingerprint
+from text_to_sql_agent.runtime.execution_guard import answer_event
+from text_to_sql_agent.grounding.schema_retriever import get_schema_retriever
+from text_to_sql_agent.grounding.example_store import get_example_store
+from text_to_sql_agent.config import settings
 
 from text_to_sql_agent.tools.post_execution_tools import summarize_result_table
+from text_to_sql_agent.result_processing.result_digest import build_result_digest
+from text_to_sql_agent.result_processing.summary_store import (
+    get_summary_store,
+    run_in_background,
+)
+from text_to_sql_agent.caching.result_cache import CachedRows
+from text_to_sql_agent.caching.question_cache import (
+    build_cache_key,
+    get_question_cache,
+)
+from text_to_sql_agent.caching.sql_templates import (
+    build_template_key,
+    get_template_cache,
+    lift_template,
+    question_shape,
+)
+
+
+@lru_cache(maxsize=1)
+def _system_prompt() -> str:
+    # Read on first generation, not at import
+    return load_markdown_content("prompts.md")
+
+# ============================================================
+# Cached SQL Lookup Node
+# ============================================================
+
+def _lookup_template(state) -> dict:
+    """
+    Match the question's shape (literals lifted out) to a stored SQL
+    template; a hit binds the question's literals as parameters.
+    """
+    templates = get_template_cache()
+
+    if templates is None:
+        return {"sql_template_hit": False}
+
+    shape = question_shape(state.user_query, state.schema_entities)
+    key = build_template_key(
+        shape,
+        schema_fingerprint=state.schema_fingerprint,
+        default_recent_limit=state.default_recent_limit,
+        default_popular_limit=state.default_popular_limit,
+    )
+
+    match = templates.lookup(key, shape) if shape.slots else None
+
+    if match is None:
+        return {
+            "sql_template_key": key,
+            "sql_template_hit": False,
+        }
+
+    template, params = match
+
+    return {
+        "sql_template_key": key,
+        "sql_template_hit": True,
+        "sql_query": template.sql,
+        "sql_params": params,
+        "sql_valid": True,
+        "validation_error": None,
+    }
+
+
+def lookup_cached_sql(state):
+    """
+    Serve previously validated SQL for the same normalized question,
+    or a stored template for a variant of it (different literals).
+    A hit skips generation and validation and goes straight to execution.
+    """
+    cache = get_question_cache()
+
+    if cache is None:
+        return {"sql_cache_hit": False, **_lookup_template(state)}
+
+    key = build_cache_key(
+        user_query=state.user_query,
+        schema_fingerprint=state.schema_fingerprint,
+        default_recent_limit=state.default_recent_limit,
+        default_popular_limit=state.default_popular_limit,
+    )
+
+    sql = cache.lookup(key)
+
+    if sql is None:
+        return {
+            "sql_cache_key": key,
+            "sql_cache_hit": False,
+            **_lookup_template(state),
+        }
+
+    return {
+        "sql_cache_key": key,
+        "sql_cache_hit": True,
+        "sql_query": sql,
+        "sql_valid": True,
+        "validation_error": None,
+    }
+
+
+async def alookup_cached_sql(state):
+    """
+    Async variant of lookup_cached_sql (the SQLite backend blocks).
+    """
+    return await asyncio.to_thread(lookup_cached_sql, state)
+
+# ============================================================
+# Schema Retrieval Node
+# ============================================================
+
+def retrieve_schema(state):
+    """
+    Narrow the schema to the tables relevant to this question (lexical
+    seeds + FK-graph expansion). Small schemas pass through.
+
+    The prompt prefix keeps a table overview that is the same for every
+    question on this schema; the subset goes in the per-query part.
+    """
+    catalog = get_runtime_catalog(state.database_id)
+
+    if len(catalog.table_columns) < settings.schema_retrieval_min_tables:
+        return {}
+
+    if state.schema_fingerprint != catalog.fingerprint:
+        return {}
+
+    retriever = get_schema_retriever(catalog, settings.schema_descriptions_path)
+    subschema = retriever.retrieve(
+        state.user_query,
+        max_seeds=settings.schema_retrieval_max_seeds,
+    )
 
+    return {
+        "schema_context": retriever.overview,
+        "schema_subset": subschema.schema_context,
+        "schema_retrieval": subschema.report(),
+    }
 
-SYSTEM_PROMPT = load_markdown_content("prompts.md")
+
+async def aretrieve_schema(state):
+    """
+    Async variant of retrieve_schema (index build + scoring are CPU-bound).
+    """
+    return await asyncio.to_thread(retrieve_schema, state)
+
+# ============================================================
+# Few-shot Example Retrieval Node
+# ============================================================
+
+def retrieve_examples(state):
+    """
+    Past questions on this schema whose SQL validated and executed,
+    most similar first, for the generation prompt.
+    """
+    store = get_example_store()
+
+    if store is None or state.execution_mode != "SQL_REQUIRED":
+        return {}
+
+    examples = store.retrieve(state.schema_fingerprint, state.user_query)
+    observe_few_shot(bool(examples))
+
+    return {"few_shot_examples": examples}
+
+
+async def aretrieve_examples(state):
+    """
+    Async variant of retrieve_examples (waits on the store's SQLite lock).
+    """
+    return await asyncio.to_thread(retrieve_examples, state)
 
 # ============================================================
 # Generate SQL Node
 # ============================================================
 
+def _generation_gate(state) -> dict | None:
+    """
+    Return an early (empty) update when generation must not run.
+    """
+
+    # ------------------------------------------------------------
+    # HARD GATE: detect schema drift
+    # ------------------------------------------------------------
+    if state.schema_fingerprint != get_schema_fingerprint(state.database_id):
+        state.termination_reason = "schema_drift_detected"
+        state.last_error_type = "terminal"
+        state.last_error_message = "Database schema has changed since startup."
+        return {}
+
+    # ------------------------------------------------------------
+    # HARD GATE: only run if router decided SQL is required
+    # ------------------------------------------------------------
+    if state.execution_mode != "SQL_REQUIRED":
+        return {}
+
+    return None
+
+
+@lru_cache(maxsize=32)
+def _prompt_prefix(schema_fingerprint: str | None, schema_context: str) -> str:
+    """
+    Byte-identical prompt prefix per schema version (built once).
+    schema_context is the full schema, or the table overview when
+    retrieval narrows large schemas (see retrieve_schema).
+    """
+    return build_prompt_prefix(_system_prompt(), schema_context)
+
+
+@lru_cache(maxsize=32)
+def _prompt_prefix_id(schema_fingerprint: str | None, schema_context: str) -> str:
+    """
+    Short hash of the prefix actually sent (labels usage records).
+    """
+    prefix = _prompt_prefix(schema_fingerprint, schema_context)
+    return hashlib.sha256(prefix.encode()).hexdigest()[:12]
+
+
+def _generation_messages(state) -> list:
+    """
+    Ground the query deterministically and build the LLM prompt.
+
+    Layout: [stable prefix: system prompt + schema] → [per-query hints
+    + question], so provider / KV prompt caches can reuse the prefix.
+    """
+    grounded_prompt = enrich_for_sql(
+        user_query=state.user_query,
+        intent=state.intent,
+        schema_entities=state.schema_entities,
+        default_recent_limit=state.default_recent_limit,
+        default_popular_limit=state.default_popular_limit,
+        examples=[(e.question, e.sql) for e in state.few_shot_examples],
+        schema_subset=state.schema_subset,
+    )
+
+    return [
+        SystemMessage(
+            content=_prompt_prefix(state.schema_fingerprint, state.schema_context)
+        ),
+        HumanMessage(content=grounded_prompt),
+    ]
+
+
+def _llm_usage(node: str, response) -> dict:
+    """
+    Token usage of one LLM call, labelled with its node (also exported).
+    """
+    usage = extract_prompt_usage(response)
+    usage["node"] = node
+    observe_llm_usage(usage)
+    return usage
+
+
+def _generation_usage(state, response, candidate: int | None = None) -> dict:
+    usage = _llm_usage("generate_sql", response)
+    usage["prompt_prefix"] = _prompt_prefix_id(
+        state.schema_fingerprint, state.schema_context
+    )
+
+    if candidate is not None:
+        usage["candidate"] = candidate
+
+    return usage
+
+
+def _generation_update(state, response) -> dict:
+    return {
+        "sql_query": normalize_sql(response),
+        "validation_error": state.validation_error,
+        "prompt_usage": state.prompt_usage + [_generation_usage(state, response)],
+    }
+
+
+# ------------------------------------------------------------
+# Speculative mode: N candidates generated + validated concurrently
+# ------------------------------------------------------------
+# Prompt variation per candidate (candidate 0 = the plain prompt)
+_CANDIDATE_HINTS = (
+    "",
+    "Prefer explicit JOINs over nested subqueries.",
+    "Prefer subqueries or CTEs over long JOIN chains.",
+    "Qualify every column with its table name.",
+)
+
+
+def _candidate_count() -> int:
+    return max(1, min(settings.sql_speculative_candidates, len(_CANDIDATE_HINTS)))
+
+
+def _candidate_messages(state, count: int) -> list[list]:
+    """
+    One prompt per candidate; hints go in front of the per-query part,
+    so every candidate shares the cached prompt prefix.
+    """
+    system, human = _generation_messages(state)
+
+    return [[system, human]] + [
+        [system, HumanMessage(content=f"{hint}\n{human.content}")]
+        for hint in _CANDIDATE_HINTS[1:count]
+    ]
+
+
+def _run_candidate(agent, index: int, messages: list, database_id: str | None):
+    response = agent.invoke(messages)
+    sql = normalize_sql(response)
+    return index, response, sql, sql_check_tool(sql, database_id)
+
+
+async def _arun_candidate(
+    agent, index: int, messages: list, database_id: str | None
+):
+    response = await agent.ainvoke(messages)
+    sql = normalize_sql(response)
+    return index, response, sql, await asql_check_tool(sql, database_id)
+
+
+def _speculative_update(state, finished: list, errors: list) -> dict:
+    """
+    Keep the first candidate that validated (completion order), else
+    the first in prompt order. A failed LLM call only matters when
+    every candidate failed.
+    """
+    if not finished:
+        raise errors[0]
+
+    chosen = next(
+        (result for result in finished if result[3] == "VALID"),
+        min(finished, key=lambda result: result[0]),
+    )
+    finished = sorted(finished, key=lambda result: result[0])
+
+    report = [
+        {
+            "candidate": index,
+            "valid": check == "VALID",
+            "chosen": index == chosen[0],
+        }
+        for index, _, _, check in finished
+    ]
+    observe_sql_candidates(report)
+
+    return {
+        "sql_query": chosen[2],
+        "validation_error": state.validation_error,
+        "sql_candidates": report,
+        "prompt_usage": state.prompt_usage + [
+            _generation_usage(state, response, index)
+            for index, response, _, _ in finished
+        ],
+    }
+
+
 def generate_sql_node(agent):
     """
     Invoke the LLM to generate SQL from schema context + user query.
     Retry-aware, bounded, and deterministically grounded.
+
+    With SQL_SPECULATIVE_CANDIDATES > 1 the candidates are generated
+    and validated concurrently and the first valid one is kept, so one
+    attempt costs about one LLM round trip instead of one per retry.
     """
 
     def _node(state):
+        gate = _generation_gate(state)
+        if gate is not None:
+            return gate
 
-        # ------------------------------------------------------------
-        # HARD GATE: detect schema drift
-        # ------------------------------------------------------------
-        if state.schema_fingerprint != SCHEMA_FINGERPRINT:
-            state.termination_reason = "schema_drift_detected"
-            state.last_error_type = "terminal"
-            state.last_error_message = "Database schema has changed since startup."
-            return {}
-
-        # ------------------------------------------------------------
-        # HARD GATE: only run if router decided SQL is required
-        # ------------------------------------------------------------
-        if state.execution_mode != "SQL_REQUIRED":
-            return {}
-
-        # ------------------------------------------------------------
-        # Ground the query deterministically
-        # ------------------------------------------------------------
-        grounded_prompt = enrich_for_sql(
-            schema_context=state.schema_context,
-            user_query=state.user_query,
-            schema_entities=state.schema_entities,
-            default_recent_limit=state.default_recent_limit,
-            default_popular_limit=state.default_popular_limit,
-        )
+        count = _candidate_count()
+        if count == 1:
+            response = agent.invoke(_generation_messages(state))
+            return _generation_update(state, response)
 
-        messages = [
-            SystemMessage(content=f"{SYSTEM_PROMPT}\n\n{grounded_prompt}")
+        finished, errors = [], []
+        executor = ContextThreadPoolExecutor(max_workers=count)
+        futures = [
+            executor.submit(_run_candidate, agent, index, messages, state.database_id)
+            for index, messages in enumerate(_candidate_messages(state, count))
         ]
 
-        response = agent.invoke(messages)
-        sql = normalize_sql(response)
+        try:
+            for future in as_completed(futures):
+                try:
+                    finished.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+                    continue
 
-        return {
-            "sql_query": sql,
-            "validation_error": state.validation_error,
-        }
+                if finished[-1][3] == "VALID":
+                    break
+        finally:
+            # Calls already in flight finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return _speculative_update(state, finished, errors)
+
+    async def _anode(state):
+        gate = _generation_gate(state)
+        if gate is not None:
+            return gate
+
+        count = _candidate_count()
+        if count == 1:
+            response = await agent.ainvoke(_generation_messages(state))
+            return _generation_update(state, response)
+
+        finished, errors = [], []
+        tasks = [
+            asyncio.ensure_future(
+                _arun_candidate(agent, index, messages, state.database_id)
+            )
+            for index, messages in enumerate(_candidate_messages(state, count))
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    finished.append(await next_done)
+                except Exception as e:
+                    errors.append(e)
+                    continue
+
+                if finished[-1][3] == "VALID":
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-    return RunnableLambda(_node)
+        return _speculative_update(state, finished, errors)
+
+    return RunnableLambda(_node, afunc=_anode)
 
 # ============================================================
 # Validate SQL Node
 # ============================================================
 
-def validate_sql(state):
+def _validation_update(state, check: str) -> dict:
+    if state.retry_count == 0:
+        # First-pass validity, split by whether examples were shown
+        observe_first_pass_validation(
+            valid=check == "VALID",
+            few_shot=bool(state.few_shot_examples),
+        )
 
-    check = sql_check_tool(state.sql_query)
+    # Parsed plan of this SQL (cost, scans, gate issues) for metadata
+    query_plan = query_plan_summary(state.sql_query, state.database_id)
 
     if check == "VALID":
         return {
+            "query_plan": query_plan,
             "sql_valid": True,
             "validation_error": None,
+            # Lets execution trust this exact SQL without re-checking
+            "validation_token": issue_validation_token(state.sql_query, state.database_id),
         }
 
     return {
+        "query_plan": query_plan,
         "sql_valid": False,
         "validation_error": check,
+        "validation_token": None,
         "retry_count": state.retry_count + 1,
         "retry_reason": "retryable_sql_error",
     }
 
+
+def validate_sql(state):
+    return _validation_update(state, sql_check_tool(state.sql_query, state.database_id))
+
+
+async def avalidate_sql(state):
+    return _validation_update(state, await asql_check_tool(state.sql_query, state.database_id))
+
 # ============================================================
 # Repair SQL Node
 # ============================================================
+
+def _should_repair(state) -> bool:
+    if not state.validation_error:
+        return False
+
+    if state.retry_count >= state.max_retries:
+        return False
+
+    return True
+
+
+def _repair_messages(state) -> list:
+    repair_prompt = repair_sql_query.invoke(
+        {
+            "context": (
+                f"User query: {state.user_query}\n\n"
+                f"Previous SQL:\n{state.sql_query}\n\n"
+                f"Validation error:\n{state.validation_error}\n\n"
+                f"Schema context:\n{state.schema_subset or state.schema_context}"
+            )
+        }
+    )
+
+    return [HumanMessage(content=repair_prompt)]
+
+
+def _repair_success(state, response) -> dict:
+    normalized_sql = normalize_sql(response)
+
+    # ------------------------------------------------------------
+    # RICH OBSERVABILITY FOR QUERY REPAIR
+    # ------------------------------------------------------------
+    state.invoked_tools.append({
+        "tool": "repair_sql_query",
+        "success": True,
+        "reason": "query_repair",
+        "repair_details": {
+            "error": state.validation_error,
+            "before_sql": state.sql_query,
+            "after_sql": normalized_sql,
+        },
+    })
+
+    return {
+        "sql_query": normalized_sql,
+        "validation_error": None,
+        "prompt_usage": state.prompt_usage + [_llm_usage("repair_sql", response)],
+    }
+
+
+def _repair_failure(state, error: Exception) -> dict:
+    state.invoked_tools.append({
+        "tool": "repair_sql_query",
+        "success": False,
+        "reason": "query_repair",
+        "error": str(error),
+    })
+    return {}
+
+
 def repair_sql_node(state):
     """
     Attempt to repair an invalid SQL query using LLM guidance.
     """
 
-    if not state.validation_error:
-        return {}
-
-    if state.retry_count >= state.max_retries:
+    if not _should_repair(state):
         return {}
 
     try:
-        original_sql = state.sql_query
-        validation_error = state.validation_error
+        response = state.llm.invoke(_repair_messages(state))
+        return _repair_success(state, response)
 
-        repair_prompt = repair_sql_query.invoke(
-            {
-                "context": (
-                    f"User query: {state.user_query}\n\n"
-                    f"Previous SQL:\n{original_sql}\n\n"
-                    f"Validation error:\n{validation_error}\n\n"
-                    f"Schema context:\n{state.schema_context}"
-                )
-            }
-        )
+    except Exception as e:
+        return _repair_failure(state, e)
 
-        repaired_sql = state.llm.invoke([
-            HumanMessage(content=repair_prompt)
-        ]).content
-
-        normalized_sql = normalize_sql(repaired_sql)
-
-        # ------------------------------------------------------------
-        # RICH OBSERVABILITY FOR QUERY REPAIR
-        # ------------------------------------------------------------
-        state.invoked_tools.append({
-            "tool": "repair_sql_query",
-            "success": True,
-            "reason": "query_repair",
-            "repair_details": {
-                "error": validation_error,
-                "before_sql": original_sql,
-                "after_sql": normalized_sql,
-            },
-        })
 
-        return {
-            "sql_query": normalized_sql,
-            "validation_error": None,
-        }
+async def arepair_sql_node(state):
+    """
+    Async variant of repair_sql_node.
+    """
 
-    except Exception as e:
-        state.invoked_tools.append({
-            "tool": "repair_sql_query",
-            "success": False,
-            "reason": "query_repair",
-            "error": str(e),
-        })
+    if not _should_repair(state):
         return {}
 
+    try:
+        response = await state.llm.ainvoke(_repair_messages(state))
+        return _repair_success(state, response)
+
+    except Exception as e:
+        return _repair_failure(state, e)
+
 # ============================================================
 # Execute SQL Node
 # ============================================================
 
-def execute_sql(state):
-    """
-    Execute validated SQL and return normalized execution result.
-    NO formatting. NO visualization. NO final_answer.
-    """
-
-    raw_result = sql_exec_tool(state.sql_query)
-
+def _normalize_rows(raw_rows) -> list[dict]:
     normalized = []
 
-    if raw_result is not None:
-        for row in raw_result:
+    if raw_rows is not None:
+        for row in raw_rows:
             if isinstance(row, dict):
                 normalized.append(row)
             elif hasattr(row, "_mapping"):
@@ -182,11 +631,70 @@ def execute_sql(state):
             else:
                 normalized.append({"value": str(row)})
 
+    return normalized
+
+
+def _remember_sql(state) -> None:
+    """
+    Record executed SQL in the question, template and few-shot stores.
+    """
     # ------------------------------------------------------------
-    # Post-execution safety limit
+    # Remember validated + executed SQL for this question
+    # (template hits hold parameterized SQL → not cached per question)
+    # ------------------------------------------------------------
+    cache = get_question_cache()
+    served_from_cache = state.sql_cache_hit or state.sql_template_hit
+
+    if cache is not None and state.sql_cache_key and not served_from_cache:
+        cache.store(state.sql_cache_key, state.sql_query)
+
+    # ------------------------------------------------------------
+    # ... and its literals-as-parameters template for variants
+    # ------------------------------------------------------------
+    templates = get_template_cache()
+
+    if templates is not None and state.sql_template_key and not served_from_cache:
+        template = lift_template(
+            state.sql_query,
+            question_shape(state.user_query, state.schema_entities),
+        )
+        if template is not None:
+            templates.store(state.sql_template_key, template)
+
     # ------------------------------------------------------------
-    MAX_ROWS = 1000
+    # ... and as a few-shot example for similar questions
+    # ------------------------------------------------------------
+    examples = get_example_store()
+
+    if examples is not None and not served_from_cache:
+        examples.record(state.schema_fingerprint, state.user_query, state.sql_query)
+
+
+def _execution_update(
+    state, raw_result, elapsed: float, remember: bool = True
+) -> dict:
+    """
+    Normalize raw rows and enforce the post-execution safety limit.
+    remember=False leaves _remember_sql to the caller.
+    """
+
+    normalized = _normalize_rows(raw_result)
+    result_cache_hit = isinstance(raw_result, CachedRows)
 
+    # Cache hits never reached the database
+    if not result_cache_hit:
+        observe_db_execution(elapsed, len(normalized))
+
+    execution_stats = {
+        "db_execution_ms": None if result_cache_hit else round(elapsed * 1000, 3),
+        "rows_returned": len(normalized),
+        "result_cache_hit": result_cache_hit,
+    }
+
+    # ------------------------------------------------------------
+    # Post-execution safety limit
+    # (the fetch is capped at MAX_ROWS + 1, so this only detects overflow)
+    # ------------------------------------------------------------
     if len(normalized) > MAX_ROWS:
         state.termination_reason = "result_size_exceeded"
         state.last_error_type = "terminal"
@@ -198,16 +706,382 @@ def execute_sql(state):
             "termination_reason": "result_size_exceeded",
             "last_error_type": "terminal",
             "last_error_message": f"Query returned more than {MAX_ROWS} rows.",
+            **execution_stats,
         }
 
+    if remember:
+        _remember_sql(state)
+
+    return {
+        "execution_result": normalized,
+        **execution_stats,
+    }
+
+
+def _timeout_update(state, error: ExecutionTimeout) -> dict:
+    """
+    Execution budget exhausted → terminal, reported distinctly.
+    """
+    state.termination_reason = "execution_timeout"
+    state.last_error_type = "terminal"
+    state.last_error_message = str(error)
     return {
-        "execution_result": normalized
+        "execution_result": None,
+        "termination_reason": "execution_timeout",
+        "last_error_type": "terminal",
+        "last_error_message": str(error),
     }
 
+
+def execute_sql(state):
+    """
+    Execute validated SQL and return normalized execution result.
+    NO formatting. NO visualization. NO final_answer.
+    """
+    start = time.perf_counter()
+
+    try:
+        raw_result = sql_exec_tool(
+            state.sql_query,
+            validation_token=state.validation_token,
+            database_id=state.database_id,
+            params=state.sql_params,
+        )
+    except ExecutionTimeout as e:
+        observe_db_execution(time.perf_counter() - start, None)
+        return _timeout_update(state, e)
+
+    return _execution_update(state, raw_result, time.perf_counter() - start)
+
+
+async def aexecute_sql(state):
+    """
+    Async variant of execute_sql.
+    Fetched rows are also pushed to the graph's custom stream in chunks
+    (a no-op unless the graph is run with stream_mode="custom").
+    """
+    writer = get_stream_writer()
+
+    def _emit_rows(chunk):
+        writer({"event": "rows", "rows": _normalize_rows(chunk)})
+
+    start = time.perf_counter()
+
+    try:
+        raw_result = await asql_exec_tool(
+            state.sql_query,
+            validation_token=state.validation_token,
+            chunk_size=settings.stream_chunk_rows,
+            on_rows=_emit_rows,
+            database_id=state.database_id,
+            params=state.sql_params,
+        )
+    except ExecutionTimeout as e:
+        observe_db_execution(time.perf_counter() - start, None)
+        return _timeout_update(state, e)
+
+    update = _execution_update(
+        state, raw_result, time.perf_counter() - start, remember=False
+    )
+
+    # SQLite-backed stores commit synchronously → off the event loop
+    if update["execution_result"] is not None:
+        await asyncio.to_thread(_remember_sql, state)
+
+    return update
+
 # ============================================================
 # Final Response Node
 # ============================================================
 
+def _clarification_messages(state) -> list:
+    clarification_prompt = request_user_clarification.invoke(
+        {
+            "context": (
+                f"User query: {state.user_query}\n"
+                f"Validation error: {state.validation_error or 'N/A'}"
+            )
+        }
+    )
+
+    return [HumanMessage(content=clarification_prompt)]
+
+
+def _non_sql_response(state, question: str) -> dict:
+    return {
+        "final_answer": {
+            "type": "clarification_required",
+            "question": question,
+            "reason": "non_sql_ambiguous",
+        },
+        "hitl_context": {
+            "original_query": state.user_query,
+            "clarification_reason": "non_sql_ambiguous",
+        },
+        "invoked_tools": [
+            {
+                "tool": "request_user_clarification",
+                "success": True,
+                "reason": "hitl",
+            }
+        ],
+    }
+
+
+def _non_sql_error() -> dict:
+    return {
+        "final_answer": {
+            "type": "error",
+            "message": (
+                "This question cannot be answered using the available database schema. "
+                "Please rephrase the question using measurable concepts like sales, revenue, or counts."
+            )
+        }
+    }
+
+
+def _summary_messages(state) -> list:
+    digest = build_result_digest(
+        state.execution_result,
+        token_budget=settings.summary_token_budget,
+    )
+    summary_prompt = summarize_result_table.invoke({"digest": digest})
+
+    return [HumanMessage(content=summary_prompt)]
+
+
+def _summary_tool_call(success: bool, error: Exception | None = None) -> dict:
+    call = {
+        "tool": "summarize_result_table",
+        "success": success,
+        "reason": "post_execution_summary",
+    }
+
+    if error is not None:
+        call["error"] = str(error)
+
+    return call
+
+
+def _format_success(state, post_summary, invoked) -> dict:
+    """
+    Deterministic output formatting based on result shape.
+    """
+    output_type = classify_output(state.execution_result)
+
+    if output_type == "scalar":
+        value = list(state.execution_result[0].values())[0]
+        return {
+            "final_answer": {
+                "type": "scalar",
+                "data": value,
+                "summary": post_summary,
+            },
+            "invoked_tools": invoked,
+        }
+
+    if output_type == "list":
+        values = [
+            list(row.values())[0]
+            for row in state.execution_result
+        ]
+        return {
+            "final_answer": {
+                "type": "list",
+                "data": values,
+                "summary": post_summary,
+            },
+            "invoked_tools": invoked,
+        }
+
+    if output_type == "time_series":
+        return {
+            "final_answer": {
+                "type": "time_series",
+                "data": state.execution_result,
+                "summary": post_summary,
+            },
+            "invoked_tools": invoked,
+        }
+
+    return {
+        "final_answer": {
+            "type": "table",
+            "data": state.execution_result,
+            "summary": post_summary,
+        },
+        "invoked_tools": invoked,
+    }
+
+
+# ------------------------------------------------------------
+# LLM-driven post-execution summary (NON-DETERMINISTIC)
+#
+# summary_mode:
+#   off        → no summary call
+#   inline     → answer streamed, then the summary call is made
+#   concurrent → summary call starts first; the answer is streamed
+#                while it runs (/chat still returns both together)
+#   deferred   → answer returned now, summary fetched later by id
+# ------------------------------------------------------------
+def _invoke_summary(state) -> tuple[str, dict]:
+    if not hasattr(state, "llm"):
+        raise RuntimeError("LLM not available in graph state")
+
+    response = state.llm.invoke(_summary_messages(state))
+    return response.content or "", _llm_usage("final_response", response)
+
+
+async def _ainvoke_summary(state) -> tuple[str, dict]:
+    if not hasattr(state, "llm"):
+        raise RuntimeError("LLM not available in graph state")
+
+    response = await state.llm.ainvoke(_summary_messages(state))
+    return response.content or "", _llm_usage("final_response", response)
+
+
+def _summary_text(state) -> str:
+    return _invoke_summary(state)[0]
+
+
+async def _asummary_text(state) -> str:
+    return (await _ainvoke_summary(state))[0]
+
+
+def _deferred_answer(state, invoked, future) -> dict:
+    summary_id = get_summary_store().register(future)
+
+    call = _summary_tool_call(True)
+    call["deferred"] = True
+    call["summary_id"] = summary_id
+    invoked.append(call)
+
+    response = _format_success(state, None, invoked)
+    response["final_answer"]["summary_id"] = summary_id
+    return response
+
+
+def _stream_answer(response: dict) -> None:
+    """
+    Send the structured answer to the graph's custom stream before the
+    summary is awaited (a no-op unless streaming).
+    """
+    get_stream_writer()(answer_event(response["final_answer"]))
+
+
+def _collect_summary(get_summary, invoked, usage) -> str | None:
+    try:
+        post_summary, call_usage = get_summary()
+        usage.append(call_usage)
+        invoked.append(_summary_tool_call(True))
+        return post_summary
+
+    except Exception as e:
+        invoked.append(_summary_tool_call(False, e))
+        return None
+
+
+async def _acollect_summary(pending, invoked, usage) -> str | None:
+    try:
+        post_summary, call_usage = await pending
+        usage.append(call_usage)
+        invoked.append(_summary_tool_call(True))
+        return post_summary
+
+    except Exception as e:
+        invoked.append(_summary_tool_call(False, e))
+        return None
+
+
+def _answer_with_summary(state) -> dict:
+    invoked = list(state.invoked_tools)
+    usage = list(state.prompt_usage)
+
+    if state.summary_mode == "off":
+        return _format_success(state, None, invoked)
+
+    if state.summary_mode == "deferred":
+        future = run_in_background(_summary_text, state)
+        return _deferred_answer(state, invoked, future)
+
+    if state.summary_mode == "concurrent":
+        future = run_in_background(_invoke_summary, state)
+        response = _format_success(state, None, invoked)
+        _stream_answer(response)
+        response["final_answer"]["summary"] = _collect_summary(
+            future.result, invoked, usage
+        )
+    else:
+        # inline (default)
+        response = _format_success(state, None, invoked)
+        _stream_answer(response)
+        response["final_answer"]["summary"] = _collect_summary(
+            lambda: _invoke_summary(state), invoked, usage
+        )
+
+    response["prompt_usage"] = usage
+    return response
+
+
+async def _aanswer_with_summary(state) -> dict:
+    invoked = list(state.invoked_tools)
+    usage = list(state.prompt_usage)
+
+    if state.summary_mode == "off":
+        return _format_success(state, None, invoked)
+
+    if state.summary_mode == "deferred":
+        task = asyncio.create_task(_asummary_text(state))
+        return _deferred_answer(state, invoked, task)
+
+    if state.summary_mode == "concurrent":
+        task = asyncio.create_task(_ainvoke_summary(state))
+        response = _format_success(state, None, invoked)
+        _stream_answer(response)
+        response["final_answer"]["summary"] = await _acollect_summary(
+            task, invoked, usage
+        )
+    else:
+        # inline (default)
+        response = _format_success(state, None, invoked)
+        _stream_answer(response)
+        response["final_answer"]["summary"] = await _acollect_summary(
+            _ainvoke_summary(state), invoked, usage
+        )
+
+    response["prompt_usage"] = usage
+    return response
+
+
+def _hitl_messages(state) -> list:
+    return [
+        HumanMessage(
+            content=(
+                "The system could not answer the user's query safely.\n\n"
+                f"User query: {state.user_query}\n"
+                f"Validation error: {state.validation_error}\n\n"
+                "Ask the user a clarification question."
+            )
+        )
+    ]
+
+
+def _hitl_response(tool_response) -> dict:
+    question = (
+        tool_response.tool_calls[0].get("output")
+        if tool_response.tool_calls
+        else tool_response.content
+    )
+
+    return {
+        "final_answer": {
+            "type": "clarification_required",
+            "question": question,
+            "reason": "ambiguous_query",
+        }
+    }
+
+
 def final_response_node(state):
     """
     Return final API response.
@@ -222,170 +1096,69 @@ def final_response_node(state):
             if not hasattr(state, "llm"):
                 raise RuntimeError("LLM not available for HITL")
 
-            clarification_prompt = request_user_clarification.invoke(
-                {
-                    "context": (
-                        f"User query: {state.user_query}\n"
-                        f"Validation error: {state.validation_error or 'N/A'}"
-                    )
-                }
-            )
+            question = state.llm.invoke(
+                _clarification_messages(state)
+            ).content or ""
 
-            question = state.llm.invoke([
-                HumanMessage(content=clarification_prompt)
-            ]).content or ""
-
-            return {
-                "final_answer": {
-                    "type": "clarification_required",
-                    "question": question,
-                    "reason": "non_sql_ambiguous",
-                },
-                "hitl_context": {
-                    "original_query": state.user_query,
-                    "clarification_reason": "non_sql_ambiguous",
-                },
-                "invoked_tools": [
-                    {
-                        "tool": "request_user_clarification",
-                        "success": True,
-                        "reason": "hitl",
-                    }
-                ],
-            }
+            return _non_sql_response(state, question)
 
         except Exception:
-            return {
-                "final_answer": {
-                    "type": "error",
-                    "message": (
-                        "This question cannot be answered using the available database schema. "
-                        "Please rephrase the question using measurable concepts like sales, revenue, or counts."
-                    )
-                }
-            }
-    
+            return _non_sql_error()
+
     # ------------------------------------------------------------
     # Case 1: Successful execution
     # ------------------------------------------------------------
     if state.sql_valid and state.execution_result is not None:
-        output_type = classify_output(state.execution_result)
+        return _answer_with_summary(state)
 
-        # --------------------------------------------------------
-        # LLM-driven post-execution summary (NON-DETERMINISTIC)
-        # --------------------------------------------------------
-        post_summary = None
-        invoked = list(state.invoked_tools)
+    # ------------------------------------------------------------
+    # Case 2: Other failures → HITL attempt, then error
+    # ------------------------------------------------------------
+    try:
+        if not hasattr(state, "llm"):
+            raise RuntimeError("LLM not available for HITL")
 
-        try:
-            if not hasattr(state, "llm"):
-                raise RuntimeError("LLM not available in graph state")
+        llm_with_tools = state.llm.bind_tools([request_user_clarification])
+        tool_response = llm_with_tools.invoke(_hitl_messages(state))
 
-            summary_prompt = summarize_result_table.invoke(
-                {"rows": state.execution_result}
-            )
+        return _hitl_response(tool_response)
 
-            post_summary = state.llm.invoke([
-                HumanMessage(content=summary_prompt)
-            ]).content or ""
+    except Exception:
+        return {
+            "final_answer": format_error_message(state.validation_error)
+        }
 
-            invoked.append({
-                "tool": "summarize_result_table",
-                "success": True,
-                "reason": "post_execution_summary",
-            })
-
-        except Exception as e:
-            invoked.append({
-                "tool": "summarize_result_table",
-                "success": False,
-                "reason": "post_execution_summary",
-                "error": str(e),
-            })
-
-        # --------------------------------------------------------
-        # Deterministic output formatting
-        # --------------------------------------------------------
-
-        if output_type == "scalar":
-            value = list(state.execution_result[0].values())[0]
-            return {
-                "final_answer": {
-                    "type": "scalar",
-                    "data": value,
-                    "summary": post_summary,
-                },
-                "invoked_tools": invoked,
-            }
 
-        if output_type == "list":
-            values = [
-                list(row.values())[0]
-                for row in state.execution_result
-            ]
-            return {
-                "final_answer": {
-                    "type": "list",
-                    "data": values,
-                    "summary": post_summary,
-                },
-                "invoked_tools": invoked,
-            }
+async def afinal_response_node(state):
+    """
+    Async variant of final_response_node.
+    """
 
-        if output_type == "time_series":
-            return {
-                "final_answer": {
-                    "type": "time_series",
-                    "data": state.execution_result,
-                    "summary": post_summary,
-                },
-                "invoked_tools": invoked,
-            }
+    if state.execution_mode == "NON_SQL_RESPONSE":
+        try:
+            if not hasattr(state, "llm"):
+                raise RuntimeError("LLM not available for HITL")
 
-        return {
-            "final_answer": {
-                "type": "table",
-                "data": state.execution_result,
-                "summary": post_summary,
-            },
-            "invoked_tools": invoked,
-        }
+            response = await state.llm.ainvoke(_clarification_messages(state))
+
+            return _non_sql_response(state, response.content or "")
+
+        except Exception:
+            return _non_sql_error()
+
+    if state.sql_valid and state.execution_result is not None:
+        return await _aanswer_with_summary(state)
 
-    # ------------------------------------------------------------
-    # Case 2: Other failures → HITL attempt, then error
-    # ------------------------------------------------------------
     try:
         if not hasattr(state, "llm"):
             raise RuntimeError("LLM not available for HITL")
 
         llm_with_tools = state.llm.bind_tools([request_user_clarification])
+        tool_response = await llm_with_tools.ainvoke(_hitl_messages(state))
 
-        tool_response = llm_with_tools.invoke([
-            HumanMessage(
-                content=(
-                    "The system could not answer the user's query safely.\n\n"
-                    f"User query: {state.user_query}\n"
-                    f"Validation error: {state.validation_error}\n\n"
-                    "Ask the user a clarification question."
-                )
-            )
-        ])
-
-        question = (
-            tool_response.tool_calls[0].get("output")
-            if tool_response.tool_calls
-            else tool_response.content
-        )
-
-        return {
-            "final_answer": {
-                "type": "clarification_required",
-                "question": question,
-                "reason": "ambiguous_query",
-            }
-        }
+        return _hitl_response(tool_response)
 
     except Exception:
         return {
             "final_answer": format_error_message(state.validation_error)
-        }
\ No newline at end of file
+        }
@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field
 from typing import Any, List, Optional, Set
 
+from text_to_sql_agent.grounding.intent_rules import IntentProfile
+
 @dataclass
 class GraphState:
     """
@@ -10,16 +12,23 @@ class GraphState:
 
     # --- Core inputs ---
     user_query: str
-    schema_context: str
+    schema_context: str   # stable per schema version (prompt prefix)
     schema_entities: Set[str] = field(default_factory=set)
+    schema_subset: Optional[str] = None   # retrieved tables, per question
+    schema_retrieval: Optional[dict] = None
+    few_shot_examples: list = field(default_factory=list)   # FewShotExample
 
     # --- Execution control ---
     execution_mode: Optional[str] = None
+    intent: Optional[IntentProfile] = None   # set once by the router
 
     # --- SQL lifecycle ---
     sql_query: Optional[str] = None
     sql_valid: bool = False
     validation_error: Optional[str] = None
+    validation_token: Optional[str] = None
+    query_plan: Optional[dict] = None   # plan gate summary
+    sql_candidates: list = field(default_factory=list)   # speculative mode report
     execution_result: Optional[List[dict[str, Any]]] = None
 
     # --- Retry policy ---
@@ -30,16 +39,36 @@ class GraphState:
     default_recent_limit: int = 10
     default_popular_limit: int = 5
 
+    # --- Post-execution summary ---
+    summary_mode: str = "inline"
+
     # --- Observability ---
     last_error_type: str | None = None
     last_error_message: str | None = None
     termination_reason: str | None = None
     retry_reason: str | None = None
 
+    database_id: str | None = None   # None → default database
     schema_fingerprint: str | None = None
 
+    # --- Question → SQL cache ---
+    sql_cache_key: str | None = None
+    sql_cache_hit: bool = False
+
+    # --- SQL templates (question variants, bound parameters) ---
+    sql_template_key: str | None = None
+    sql_template_hit: bool = False
+    sql_params: dict | None = None
+
     # --- Tool + LLM metadata ---
     invoked_tools: list[dict] = field(default_factory=list)
+    prompt_usage: list[dict] = field(default_factory=list)
+
+    # --- Timing (runtime.instrumentation) ---
+    node_timings: list[dict] = field(default_factory=list)
+    db_execution_ms: float | None = None
+    rows_returned: int | None = None
+    result_cache_hit: bool = False
 
     llm: Any | None = None   # ✅ ADD THIS
 
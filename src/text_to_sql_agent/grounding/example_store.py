@@ -0,0 +1,282 @@
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from text_to_sql_agent.config import settings
+from text_to_sql_agent.caching.question_cache import normalize_question
+
+# Hashed feature space (float32 → 4 KB per stored example)
+VECTOR_DIM = 1024
+
+
+# ============================================================
+# Offline vectorizer (hashed word / bigram / char-trigram features)
+# ============================================================
+def _features(question: str) -> list[str]:
+    q = normalize_question(question)
+    words = q.split()
+    padded = f" {q} "
+
+    return (
+        [f"w:{w}" for w in words]
+        + [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        + [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    )
+
+
+def vectorize(question: str, dim: int = VECTOR_DIM) -> np.ndarray:
+    """
+    L2-normalized hashed n-gram vector of a question.
+
+    crc32 is stable across processes (unlike hash()), so persisted
+    examples can be re-vectorized identically on load.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    features = _features(question)
+
+    if not features:
+        return vector
+
+    hashes = np.fromiter(
+        (zlib.crc32(f.encode()) for f in features),
+        dtype=np.uint32,
+        count=len(features),
+    )
+    # Signed hashing: collisions cancel out instead of piling up
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+    np.add.at(vector, hashes % dim, signs)
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# ============================================================
+# Per-schema index
+# ============================================================
+@dataclass(frozen=True)
+class FewShotExample:
+    question: str
+    sql: str
+    score: float
+
+    def report(self) -> dict:
+        return {"question": self.question, "score": round(self.score, 3)}
+
+
+class _ExampleIndex:
+    """
+    Vectors of one schema's examples; the oldest slot is reused once
+    max_examples is reached.
+    """
+
+    def __init__(self, max_examples: int):
+        self.max_examples = max_examples
+        self.vectors = np.zeros((min(max_examples, 64), VECTOR_DIM), dtype=np.float32)
+        self.examples: list[tuple[str, str]] = []
+        self.keys: list[str] = []
+        self.slots: dict[str, int] = {}
+        self.order: deque[int] = deque()
+
+    def add(self, key: str, question: str, sql: str):
+        slot = self.slots.get(key)
+
+        if slot is None:
+            if len(self.examples) < self.max_examples:
+                slot = len(self.examples)
+                self.examples.append((question, sql))
+                self.keys.append(key)
+                self._ensure_capacity(slot + 1)
+            else:
+                slot = self.order.popleft()
+                del self.slots[self.keys[slot]]
+
+            self.slots[key] = slot
+            self.order.append(slot)
+
+        self.examples[slot] = (question, sql)
+        self.keys[slot] = key
+        self.vectors[slot] = vectorize(question)
+
+    def _ensure_capacity(self, size: int):
+        if size <= self.vectors.shape[0]:
+            return
+
+        grown = np.zeros(
+            (min(self.vectors.shape[0] * 2, self.max_examples), VECTOR_DIM),
+            dtype=np.float32,
+        )
+        grown[: self.vectors.shape[0]] = self.vectors
+        self.vectors = grown
+
+    def search(self, question: str, k: int, min_similarity: float) -> list[FewShotExample]:
+        count = len(self.examples)
+        if count == 0 or k <= 0:
+            return []
+
+        scores = self.vectors[:count] @ vectorize(question)
+
+        if count > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(count)
+
+        ranked = sorted(top, key=lambda i: -scores[i])
+
+        return [
+            FewShotExample(*self.examples[i], score=float(scores[i]))
+            for i in ranked
+            if scores[i] >= min_similarity
+        ]
+
+
+# ============================================================
+# Store (persistence + counters)
+# ============================================================
+class FewShotExampleStore:
+    """
+    Successful question → SQL pairs per schema fingerprint, retrieved
+    by cosine similarity as few-shot examples for SQL generation.
+
+    Persisted to a local SQLite file when a path is given; each schema's
+    index is loaded on its first lookup.
+    """
+
+    def __init__(
+        self,
+        k: int,
+        min_similarity: float,
+        max_examples: int,
+        path: str | Path | None = None,
+    ):
+        self.k = k
+        self.min_similarity = min_similarity
+        self.max_examples = max_examples
+        self.lookups = 0
+        self.hits = 0
+        self.recorded = 0
+
+        self._indexes: dict[str, _ExampleIndex] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path:
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS few_shot_examples (
+                    fingerprint TEXT NOT NULL,
+                    question_key TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    sql TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (fingerprint, question_key)
+                )
+            """)
+            self._conn.commit()
+
+    def _index(self, fingerprint: str) -> _ExampleIndex:
+        index = self._indexes.get(fingerprint)
+        if index is not None:
+            return index
+
+        index = _ExampleIndex(self.max_examples)
+
+        if self._conn is not None:
+            rows = self._conn.execute(
+                "SELECT question_key, question, sql FROM few_shot_examples "
+                "WHERE fingerprint = ? ORDER BY created_at DESC LIMIT ?",
+                (fingerprint, self.max_examples),
+            ).fetchall()
+
+            for key, question, sql in reversed(rows):
+                index.add(key, question, sql)
+
+        self._indexes[fingerprint] = index
+        return index
+
+    def retrieve(self, fingerprint: str | None, question: str) -> list[FewShotExample]:
+        if not fingerprint:
+            return []
+
+        with self._lock:
+            examples = self._index(fingerprint).search(
+                question, self.k, self.min_similarity
+            )
+            self.lookups += 1
+            if examples:
+                self.hits += 1
+
+        return examples
+
+    def record(self, fingerprint: str | None, question: str, sql: str) -> None:
+        """
+        Remember SQL that validated AND executed for this question.
+        """
+        key = normalize_question(question)
+        if not fingerprint or not key or not sql:
+            return
+
+        with self._lock:
+            self._index(fingerprint).add(key, question, sql)
+            self.recorded += 1
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO few_shot_examples "
+                    "(fingerprint, question_key, question, sql, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (fingerprint, key, question, sql, time.time()),
+                )
+                # Same bound as the in-memory index
+                self._conn.execute(
+                    """
+                    DELETE FROM few_shot_examples
+                    WHERE fingerprint = ? AND question_key IN (
+                        SELECT question_key FROM few_shot_examples
+                        WHERE fingerprint = ?
+                        ORDER BY created_at DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (fingerprint, fingerprint, self.max_examples),
+                )
+                self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM few_shot_examples")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "recorded": self.recorded,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_example_store() -> FewShotExampleStore | None:
+    """
+    Process-wide few-shot store built from settings (None when
+    FEW_SHOT_K is 0).
+    """
+    if settings.few_shot_k <= 0:
+        return None
+
+    return FewShotExampleStore(
+        k=settings.few_shot_k,
+        min_similarity=settings.few_shot_min_similarity,
+        max_examples=settings.few_shot_max_examples,
+        path=settings.few_shot_store_path,
+    )
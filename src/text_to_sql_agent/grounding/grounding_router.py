@@ -1,8 +1,11 @@
-from text_to_sql_agent.grounding.intent_rules import requires_sql
+from text_to_sql_agent.grounding.intent_rules import analyze_intent
 
 def routing_node():
     def _node(state):
-        if requires_sql(state.user_query):
+        # Single pass: the profile is reused by enrichment downstream
+        state.intent = analyze_intent(state.user_query, state.schema_entities)
+
+        if state.intent.requires_sql:
             state.execution_mode = "SQL_REQUIRED"
         else:
             state.execution_mode = "NON_SQL_RESPONSE"
@@ -1,27 +1,14 @@
-GROUPING_MARKERS = [
-    "per ",
-    "by ",
-    "for each ",
-    "grouped by ",
-]
+from text_to_sql_agent.grounding.intent_rules import GROUPING_MARKERS, analyze_intent
+
+__all__ = ["GROUPING_MARKERS", "has_grouping_intent", "resolve_grouping_entity"]
+
 
 def has_grouping_intent(query: str) -> bool:
-    q = query.lower()
-    return any(marker in q for marker in GROUPING_MARKERS)
+    return analyze_intent(query).grouping
 
 
 def resolve_grouping_entity(
     query: str,
     schema_entities: set[str],
 ) -> str | None:
-    q = query.lower()
-
-    for marker in GROUPING_MARKERS:
-        if marker in q:
-            fragment = q.split(marker, 1)[1]
-            candidate = fragment.split()[0]
-
-            if candidate in schema_entities:
-                return candidate
-
-    return None
+    return analyze_intent(query, schema_entities).grouping_entity
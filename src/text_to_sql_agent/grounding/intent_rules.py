@@ -1,81 +1,177 @@
-def requires_sql(query: str) -> bool:
-    q = query.lower()
-
-    explicit_sql_terms = [
-        "total", "sum", "count", "average", "avg",
-        "maximum", "minimum", "max", "min",
-        "list", "show", "give me",
-    ]
-
-    implicit_aggregation_terms = [
-        "how much",
-        "overall",
-        "in total",
-        "amount",
-        "revenue",
-        "sales",
-    ]
-
-    grouping_terms = [
-        " per ",
-        " by ",
-        " for each ",
-    ]
-
-    ranking_terms = [
-        "most",
-        "least",
-        "top",
-        "bottom",
-        "highest",
-        "lowest",
-        "best",
-        "worst",
-        "popular",
-        "unpopular",
-    ]
-
-    temporal_terms = [
-        "recent",
-        "latest",
-        "newest",
-        "oldest",
-        "earliest",
-        "last",
-        "past",
-        "previous",
-        "recently",
-    ]
-
-    # Measurable / value-bearing concepts
-    measurable_terms = [
-        "price",
-        "amount",
-        "total",
-        "revenue",
-        "sales",
-        "count",
-        "quantity",
-        "number",
-        "duration",
-        "length",
-        "time",
-    ]
-
-    has_sql_signal = any(
-        term in q
-        for term in (
-            explicit_sql_terms
-            + implicit_aggregation_terms
-            + grouping_terms
-            + temporal_terms
-        )
-    )
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+# ============================================================
+# Vocabularies (term → intent categories)
+# ============================================================
+
+# Clear aggregation / listing intent
+SQL_SIGNAL_TERMS = [
+    "total", "sum", "count", "average", "avg",
+    "maximum", "minimum", "max", "min",
+    "list", "show", "give me",
+    # implicit aggregation
+    "how much", "overall", "in total", "amount", "revenue", "sales",
+    # time-window phrasing
+    "past", "previous",
+]
+
+GROUPING_MARKERS = [
+    "per",
+    "by",
+    "for each",
+    "grouped by",
+]
+
+RANKING_TERMS = [
+    "most", "least", "top", "bottom", "highest", "lowest",
+    "best", "worst", "popular", "unpopular",
+]
+
+TEMPORAL_TERMS = [
+    "recent", "recently", "latest", "newest", "oldest", "earliest", "last",
+]
+
+# Measurable / value-bearing concepts
+MEASURE_TERMS = [
+    "price", "amount", "total", "revenue", "sales", "count",
+    "quantity", "number", "duration", "length", "time",
+]
+
+# Terms that carry a fixed SQL meaning (see query_enricher.ranking_hint)
+HINT_TERMS = {
+    "popular": ["popular", "unpopular", "popularity"],
+    "purchased": ["purchased", "sold"],
+    "descending": ["most", "top"],
+    "ascending": ["least"],
+    "recent": ["recent", "recently", "latest"],
+}
+
+
+def _build_vocabulary() -> dict[str, frozenset[str]]:
+    vocabulary: dict[str, set[str]] = {}
+
+    def add(terms: Iterable[str], category: str):
+        for term in terms:
+            vocabulary.setdefault(term, set()).add(category)
+
+    add(SQL_SIGNAL_TERMS, "sql")
+    add(GROUPING_MARKERS, "grouping")
+    add(RANKING_TERMS, "ranking")
+    add(TEMPORAL_TERMS, "temporal")
+    add(MEASURE_TERMS, "measure")
+
+    for hint, terms in HINT_TERMS.items():
+        add(terms, f"hint:{hint}")
+
+    return {term: frozenset(cats) for term, cats in vocabulary.items()}
+
+
+# ============================================================
+# Compiled matcher
+# ============================================================
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Prefix-factored alternation (a regex trie): matching cost depends
+    on the query length, not on the number of terms.
+    """
+    trie: dict = {}
+
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        branches = []
+        optional = "" in node
 
-    has_ranking = any(term in q for term in ranking_terms)
-    has_measure = any(term in q for term in measurable_terms)
+        for char in sorted(k for k in node if k):
+            token = r"\s+" if char == " " else re.escape(char)
+            branches.append(token + render(node[char]))
+
+        if not branches:
+            return ""
+
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if optional else body
+
+    return render(trie)
+
+
+VOCABULARY = _build_vocabulary()
+
+# One pass over the query; optional plural suffix, whole words only
+_MATCHER = re.compile(rf"\b({_trie_pattern(VOCABULARY)})(?:e?s)?\b")
+_NEXT_WORD = re.compile(r"\s*([a-z0-9_]+)")
+
+
+# ============================================================
+# Intent profile
+# ============================================================
+
+@dataclass(frozen=True)
+class IntentProfile:
+    """
+    Everything the router and the prompt enricher need to know about
+    a question, computed once per request.
+    """
+
+    requires_sql: bool
+    grouping: bool
+    grouping_entity: str | None
+    ranking: bool
+    temporal: bool
+    measures: tuple[str, ...]
+    hints: frozenset[str]
+
+
+def analyze_intent(
+    query: str,
+    schema_entities: Iterable[str] = (),
+) -> IntentProfile:
+    """
+    Scan the query once with the compiled matcher and derive all
+    routing / enrichment signals from the matches.
+    """
+    q = (query or "").lower()
+    categories: set[str] = set()
+    measures: list[str] = []
+    grouping_entity = None
+    entities = schema_entities if isinstance(schema_entities, (set, frozenset)) else set(schema_entities)
+
+    for match in _MATCHER.finditer(q):
+        term = " ".join(match.group(1).split())
+        term_categories = VOCABULARY[term]
+        categories |= term_categories
+
+        if "measure" in term_categories and term not in measures:
+            measures.append(term)
+
+        if "grouping" in term_categories and grouping_entity is None:
+            candidate = _NEXT_WORD.match(q, match.end())
+            if candidate and candidate.group(1) in entities:
+                grouping_entity = candidate.group(1)
+
+    has_sql_signal = bool(categories & {"sql", "grouping", "temporal"})
+    ranking = "ranking" in categories
 
     # Core rule:
     # - SQL if clear aggregation / grouping / temporal intent
     # - OR ranking *with* a measurable concept
-    return has_sql_signal or (has_ranking and has_measure)
+    return IntentProfile(
+        requires_sql=has_sql_signal or (ranking and bool(measures)),
+        grouping="grouping" in categories,
+        grouping_entity=grouping_entity,
+        ranking=ranking,
+        temporal="temporal" in categories,
+        measures=tuple(measures),
+        hints=frozenset(c.split(":", 1)[1] for c in categories if c.startswith("hint:")),
+    )
+
+
+def requires_sql(query: str) -> bool:
+    return analyze_intent(query).requires_sql
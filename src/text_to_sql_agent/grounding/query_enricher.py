@@ -1,77 +1,77 @@
-from text_to_sql_agent.grounding.grouping import (
-    has_grouping_intent,
-    resolve_grouping_entity,
-)
+from text_to_sql_agent.grounding.intent_rules import IntentProfile, analyze_intent
 
 # ============================================================
 # Global ranking / popularity enrichment
-def ranking_hint(query: str) -> str:
-    q = query.lower()
-    hints = []
-
-    if "popular" in q:
-        hints.append(
-            "The term 'popular' means highest frequency of occurrence.\n"
-            "You MUST use an aggregate COUNT to measure popularity.\n"
-        )
+RANKING_HINTS = {
+    "popular": (
+        "The term 'popular' means highest frequency of occurrence.\n"
+        "You MUST use an aggregate COUNT to measure popularity.\n"
+    ),
+    "purchased": (
+        "The term 'purchased' or 'sold' means total quantity.\n"
+        "You MUST use SUM(quantity) to measure this.\n"
+    ),
+    "descending": (
+        "The term 'most' or 'top' means ORDER BY the aggregate in DESCENDING order.\n"
+        "You MUST apply ORDER BY ... DESC and LIMIT the result appropriately.\n"
+    ),
+    "ascending": (
+        "The term 'least' means ORDER BY the aggregate in ASCENDING order.\n"
+        "You MUST apply ORDER BY ... ASC.\n"
+    ),
+    "recent": (
+        "The term 'recent' or 'latest' means most recent by time.\n"
+        "You MUST ORDER BY a date or timestamp column in DESCENDING order.\n"
+    ),
+}
+
+
+def ranking_hint(intent: IntentProfile) -> str:
+    return "\n".join(
+        text for hint, text in RANKING_HINTS.items() if hint in intent.hints
+    )
 
-    if "purchased" in q or "sold" in q:
-        hints.append(
-            "The term 'purchased' or 'sold' means total quantity.\n"
-            "You MUST use SUM(quantity) to measure this.\n"
-        )
+# ============================================================
+# Static, cacheable prompt prefix
+def build_prompt_prefix(system_prompt: str, schema_context: str) -> str:
+    """
+    Build the request-independent part of the SQL prompt.
 
-    if "most" in q or "top" in q:
-        hints.append(
-            "The term 'most' or 'top' means ORDER BY the aggregate in DESCENDING order.\n"
-            "You MUST apply ORDER BY ... DESC and LIMIT the result appropriately.\n"
-        )
+    It depends only on the system prompt and the schema, so it is
+    byte-identical across requests for one schema version and can be
+    reused by provider prompt caches / local KV caches.
+    """
+    return f"""{system_prompt}
 
-    if "least" in q:
-        hints.append(
-            "The term 'least' means ORDER BY the aggregate in ASCENDING order.\n"
-            "You MUST apply ORDER BY ... ASC.\n"
-        )
-
-    if "recent" in q or "latest" in q:
-        hints.append(
-            "The term 'recent' or 'latest' means most recent by time.\n"
-            "You MUST ORDER BY a date or timestamp column in DESCENDING order.\n"
-        )
+You must generate a SQL query using the schema below.
+Only SELECT or WITH queries are allowed.
+Do NOT answer in natural language.
 
-    return "\n".join(hints)
-
-def has_ranking_intent(query: str) -> bool:
-    q = query.lower()
-    return any(term in q for term in [
-        "most",
-        "least",
-        "top",
-        "bottom",
-        "highest",
-        "lowest",
-        "best",
-        "worst",
-        "popular",
-        "unpopular",
-    ])
+Schema:
+{schema_context}
+"""
 
 # ============================================================
-# Main enrichment function
+# Main enrichment function (per-query suffix)
 def enrich_for_sql(
-    schema_context: str,
-    schema_entities: set[str],
     user_query: str,
+    intent: IntentProfile | None = None,
+    schema_entities: set[str] | None = None,
     default_recent_limit: int | None = None,
     default_popular_limit: int | None = None,
+    examples: list[tuple[str, str]] | None = None,
+    schema_subset: str | None = None,
 ) -> str:
+    if intent is None:
+        intent = analyze_intent(user_query, schema_entities or ())
+
     grouping_hint = ""
 
     # ------------------------------------------------------------
     # GROUP BY enrichment
     # ------------------------------------------------------------
-    if has_grouping_intent(user_query):
-        entity = resolve_grouping_entity(user_query, schema_entities)
+    if intent.grouping:
+        entity = intent.grouping_entity
 
         if entity:
             grouping_hint = (
@@ -88,14 +88,14 @@ def enrich_for_sql(
     # ------------------------------------------------------------
     # Ranking / popularity enrichment (semantic meaning)
     # ------------------------------------------------------------
-    ranking_enrichment = ranking_hint(user_query)
+    ranking_enrichment = ranking_hint(intent)
 
     # ------------------------------------------------------------
     # Temporal / recency enrichment (LIMIT policy)
     # ------------------------------------------------------------
     temporal_enrichment = ""
 
-    if default_recent_limit is not None and has_temporal_intent(user_query):
+    if default_recent_limit is not None and intent.temporal:
         temporal_enrichment = (
             "\nThe query requests recent or time-ordered records.\n"
             f"If no explicit limit is specified, you MUST include "
@@ -109,7 +109,7 @@ def enrich_for_sql(
 
     if (
         default_popular_limit is not None
-        and has_ranking_intent(user_query)
+        and intent.ranking
     ):
         ranking_limit_enrichment = (
             "\nThe query requests ranked results.\n"
@@ -117,32 +117,36 @@ def enrich_for_sql(
             f"LIMIT {default_popular_limit}.\n"
         )
 
-    return f"""
-You must generate a SQL query using the schema below.
-Only SELECT or WITH queries are allowed.
-Do NOT answer in natural language.
+    # ------------------------------------------------------------
+    # Few-shot examples (similar past questions, SQL that executed)
+    # ------------------------------------------------------------
+    examples_enrichment = ""
+
+    if examples:
+        shown = "\n\n".join(
+            f"Example question: {question}\nExample SQL: {sql}" for question, sql in examples
+        )
+        examples_enrichment = (
+            "\nSimilar questions answered correctly on this schema:\n\n"
+            f"{shown}\n"
+        )
+
+    # ------------------------------------------------------------
+    # Retrieved tables (large schemas: the prefix only lists names)
+    # ------------------------------------------------------------
+    schema_enrichment = ""
+
+    if schema_subset:
+        schema_enrichment = f"\nRelevant schema for this question:\n{schema_subset}\n"
 
+    return f"""
+{schema_enrichment}
 {grouping_hint}
 {ranking_enrichment}
 {temporal_enrichment}
 {ranking_limit_enrichment}
-
-Schema:
-{schema_context}
+{examples_enrichment}
 
 Question:
 {user_query}
 """
-
-# ============================================================
-# Temporal intent detection
-def has_temporal_intent(query: str) -> bool:
-    q = query.lower()
-    return any(term in q for term in [
-        "recent",
-        "latest",
-        "newest",
-        "oldest",
-        "earliest",
-        "last",
-    ])
@@ -0,0 +1,284 @@
+import json
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+
+from text_to_sql_agent.config import settings
+from text_to_sql_agent.schema_analysis import build_schema_context
+from text_to_sql_agent.schema_catalog import SchemaCatalog
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "by", "each", "for", "from", "give", "has",
+    "have", "how", "in", "is", "list", "me", "much", "many", "of", "on",
+    "per", "show", "the", "to", "top", "what", "which", "who", "with",
+}
+
+# Query terms this short are matched exactly, never as substrings
+MIN_SUBSTRING_TERM = 4
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split identifiers / prose into lowercase terms.
+    snake_case and camelCase are split; trailing plural 's' is dropped.
+    """
+    text = _CAMEL.sub(" ", text or "")
+    terms = []
+
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        terms.append(word)
+
+    return terms
+
+
+@dataclass(frozen=True)
+class SubSchema:
+    """
+    Minimal connected slice of the schema for one question.
+    """
+
+    tables: tuple[str, ...]
+    seeds: tuple[str, ...]
+    schema_context: str
+    total_tables: int
+
+    @property
+    def pruned_tables(self) -> int:
+        return self.total_tables - len(self.tables)
+
+    def report(self) -> dict:
+        return {
+            "seeds": list(self.seeds),
+            "tables": list(self.tables),
+            "total_tables": self.total_tables,
+            "pruned_tables": self.pruned_tables,
+        }
+
+
+class SchemaRetriever:
+    """
+    Offline BM25 index over table names, column names and optional
+    descriptions, plus FK-graph expansion into a connected subschema.
+    """
+
+    def __init__(
+        self,
+        catalog: SchemaCatalog,
+        descriptions: dict[str, str] | None = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.catalog = catalog
+        self.k1 = k1
+        self.b = b
+        descriptions = descriptions or {}
+
+        # Stable stand-in for the full schema in the prompt prefix;
+        # the retrieved tables go with each question
+        self.overview = (
+            "Tables (columns of the relevant ones are listed with the question):\n"
+            + ", ".join(catalog.table_columns)
+        )
+
+        self._docs: dict[str, Counter] = {}
+
+        for table, columns in catalog.table_columns.items():
+            terms = tokenize(table) * 2  # table name weighs double
+            for column in sorted(columns):
+                terms += tokenize(column)
+            terms += tokenize(descriptions.get(table, ""))
+            for column in columns:
+                terms += tokenize(descriptions.get(f"{table}.{column}", ""))
+            self._docs[table] = Counter(terms)
+
+        self._doc_len = {t: sum(tf.values()) for t, tf in self._docs.items()}
+        self._avg_len = (
+            sum(self._doc_len.values()) / len(self._docs) if self._docs else 0.0
+        )
+
+        df = Counter()
+        for tf in self._docs.values():
+            df.update(tf.keys())
+
+        n = len(self._docs)
+        self._idf = {
+            term: math.log(1 + (n - freq + 0.5) / (freq + 0.5))
+            for term, freq in df.items()
+        }
+
+        # Substring → vocabulary terms containing it, so query
+        # expansion is a lookup instead of a vocabulary scan
+        contained: dict[str, set[str]] = {}
+        for term in self._idf:
+            for start in range(len(term) - MIN_SUBSTRING_TERM + 1):
+                for end in range(start + MIN_SUBSTRING_TERM, len(term) + 1):
+                    contained.setdefault(term[start:end], set()).add(term)
+        self._containing = {
+            part: frozenset(terms) for part, terms in contained.items()
+        }
+
+    # --------------------------------------------------------
+    # Lexical scoring
+    # --------------------------------------------------------
+    def _expand_terms(self, query: str) -> set[str]:
+        """
+        Query terms plus vocabulary terms that contain them
+        (e.g. 'country' → 'billingcountry').
+        """
+        expanded = set()
+
+        for term in tokenize(query):
+            if term in self._idf:
+                expanded.add(term)
+            if len(term) >= MIN_SUBSTRING_TERM:
+                expanded.update(self._containing.get(term, ()))
+
+        return expanded
+
+    def score(self, query: str) -> dict[str, float]:
+        terms = self._expand_terms(query)
+        scores = {}
+
+        for table, tf in self._docs.items():
+            norm = self.k1 * (1 - self.b + self.b * self._doc_len[table] / (self._avg_len or 1))
+            total = 0.0
+
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    total += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+
+            if total > 0:
+                scores[table] = total
+
+        return scores
+
+    # --------------------------------------------------------
+    # FK-graph expansion
+    # --------------------------------------------------------
+    def _shortest_path(self, sources: set[str], target: str) -> list[str]:
+        graph = self.catalog.join_graph
+        parents = {s: None for s in sources}
+        queue = deque(sources)
+
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                return path
+
+            for neighbour in graph.get(node, ()):
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    queue.append(neighbour)
+
+        return [target]  # unreachable → include standalone
+
+    def retrieve(
+        self,
+        query: str,
+        max_seeds: int = 5,
+        min_relative_score: float = 0.3,
+    ) -> SubSchema:
+        """
+        Pick seed tables for the question and connect them along FKs.
+        Falls back to the full schema when nothing matches.
+        """
+        catalog = self.catalog
+        scores = self.score(query)
+
+        if not scores:
+            return SubSchema(
+                tables=tuple(catalog.table_columns),
+                seeds=(),
+                schema_context=catalog.schema_context,
+                total_tables=len(catalog.table_columns),
+            )
+
+        best = max(scores.values())
+        seeds = [
+            t for t, s in sorted(scores.items(), key=lambda kv: -kv[1])
+            if s >= best * min_relative_score
+        ][:max_seeds]
+
+        selected = {seeds[0]}
+        for seed in seeds[1:]:
+            if seed not in selected:
+                selected.update(self._shortest_path(selected, seed))
+
+        # Keep catalog order → deterministic prompt text
+        tables = tuple(t for t in catalog.table_columns if t in selected)
+
+        return SubSchema(
+            tables=tables,
+            seeds=tuple(seeds),
+            schema_context=self._render(tables),
+            total_tables=len(catalog.table_columns),
+        )
+
+    def _render(self, tables: tuple[str, ...]) -> str:
+        keep = set(tables)
+
+        return build_schema_context(
+            {t: {"columns": self.catalog.table_columns[t]} for t in tables},
+            {
+                t: [fk for fk in fks if fk[1] in keep]
+                for t, fks in self.catalog.foreign_keys.items()
+                if t in keep and any(fk[1] in keep for fk in fks)
+            },
+        )
+
+
+def load_schema_descriptions(path: str | None) -> dict[str, str]:
+    """
+    Optional JSON file: {"table": "...", "table.column": "..."}.
+    """
+    if not path:
+        return {}
+
+    with open(Path(path), "r", encoding="utf-8") as f:
+        return {k.lower(): v for k, v in json.load(f).items()}
+
+
+# LRU sized like the database registry: one index per resident schema
+_RETRIEVERS: OrderedDict[tuple[str, str | None], SchemaRetriever] = OrderedDict()
+_RETRIEVERS_LOCK = threading.Lock()
+
+
+def get_schema_retriever(
+    catalog: SchemaCatalog,
+    descriptions_path: str | None = None,
+) -> SchemaRetriever:
+    """
+    One retriever (index) per schema fingerprint, built once under a lock.
+    """
+    key = (catalog.fingerprint, descriptions_path)
+
+    with _RETRIEVERS_LOCK:
+        retriever = _RETRIEVERS.get(key)
+
+        if retriever is None:
+            retriever = SchemaRetriever(
+                catalog, load_schema_descriptions(descriptions_path)
+            )
+            _RETRIEVERS[key] = retriever
+
+        _RETRIEVERS.move_to_end(key)
+
+        while len(_RETRIEVERS) > settings.db_registry_max_resident:
+            _RETRIEVERS.popitem(last=False)
+
+    return retriever
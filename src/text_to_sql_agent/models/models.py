@@ -1,4 +1,17 @@
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 class ChatRequest(BaseModel):
-    query: str
\ No newline at end of file
+    query: str
+    # None → server default (SUMMARY_MODE)
+    summary_mode: Optional[Literal["off", "inline", "deferred", "concurrent"]] = None
+    # None → DEFAULT_DATABASE_ID
+    database_id: Optional[str] = None
+
+
+class BatchChatRequest(BaseModel):
+    queries: List[str] = Field(min_length=1)
+    # Applies to every query in the batch
+    summary_mode: Optional[Literal["off", "inline", "deferred", "concurrent"]] = None
+    database_id: Optional[str] = None
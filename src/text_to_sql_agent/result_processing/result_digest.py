@@ -0,0 +1,121 @@
+import json
+from typing import Any, Dict, List
+
+import pandas as pd
+
+# Rough provider-agnostic estimate: ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(payload: Any) -> int:
+    return len(json.dumps(payload, default=str)) // CHARS_PER_TOKEN
+
+
+def _column_kind(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    return "text"
+
+
+def _pick_measure(numeric_columns: List[str]) -> str | None:
+    """
+    Pick the column rankings are based on.
+    Aggregates usually come last in SELECT lists; IDs are never measures.
+    """
+    candidates = [c for c in numeric_columns if not c.lower().endswith("id")]
+    return candidates[-1] if candidates else None
+
+
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    return json.loads(frame.to_json(orient="records", date_format="iso"))
+
+
+def build_result_digest(
+    rows: List[Dict[str, Any]],
+    token_budget: int,
+    k: int = 5,
+    sample_size: int = 5,
+) -> Dict[str, Any]:
+    """
+    Compact, bounded representation of a result set for the summary LLM.
+
+    Small results are passed through verbatim. Larger ones are reduced
+    to column types, row count, min/max/mean per numeric column,
+    top/bottom-k rows by the main measure and a small evenly spaced
+    sample. k and the sample shrink until the digest fits the budget;
+    past that, stats are dropped and then trailing columns.
+
+    Args:
+        rows: Normalized execution result.
+        token_budget: Hard upper bound (estimated tokens).
+        k: Rows to keep at each extreme of the measure.
+        sample_size: Representative rows to keep.
+
+    Returns:
+        JSON-serializable digest.
+    """
+    frame = pd.DataFrame(rows)
+    frame.columns = [str(c) for c in frame.columns]
+
+    columns = {c: _column_kind(frame[c]) for c in frame.columns}
+    numeric_columns = [c for c, kind in columns.items() if kind == "numeric"]
+
+    digest: Dict[str, Any] = {
+        "row_count": len(frame),
+        "columns": columns,
+    }
+
+    if len(frame) <= 2 * k:
+        digest["rows"] = _records(frame)
+        if estimate_tokens(digest) <= token_budget:
+            return digest
+        del digest["rows"]
+
+    # Single vectorized aggregation over all numeric columns
+    if numeric_columns:
+        stats = frame[numeric_columns].agg(["min", "max", "mean"]).round(4)
+        digest["stats"] = json.loads(stats.to_json())
+
+    measure = _pick_measure(numeric_columns)
+    if measure is not None:
+        digest["measure"] = measure
+
+    while True:
+        if measure is not None and k > 0:
+            digest["top"] = _records(frame.nlargest(k, measure))
+            digest["bottom"] = _records(frame.nsmallest(k, measure))
+        else:
+            digest.pop("top", None)
+            digest.pop("bottom", None)
+
+        if sample_size > 0:
+            step = max(len(frame) // sample_size, 1)
+            digest["sample"] = _records(frame.iloc[::step].head(sample_size))
+        else:
+            digest.pop("sample", None)
+
+        if estimate_tokens(digest) <= token_budget or (k == 0 and sample_size == 0):
+            break
+
+        k //= 2
+        sample_size //= 2
+
+    if estimate_tokens(digest) > token_budget:
+        # Wide schemas: keep only the shape of the result
+        digest.pop("stats", None)
+        digest.pop("measure", None)
+
+    if estimate_tokens(digest) > token_budget:
+        # Very wide schemas: keep the leading columns that fit
+        kept = dict(columns)
+        digest["columns"] = kept
+
+        while kept and estimate_tokens(digest) > token_budget:
+            kept.popitem()
+            digest["columns_omitted"] = len(columns) - len(kept)
+
+    return digest
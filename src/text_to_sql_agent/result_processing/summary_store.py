@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+from text_to_sql_agent.config import settings
+
+# Background LLM calls for sync graph runs (deferred / concurrent)
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.summary_workers,
+    thread_name_prefix="summary",
+)
+
+
+def run_in_background(fn, *args) -> Future:
+    return _EXECUTOR.submit(fn, *args)
+
+
+class DeferredSummaryStore:
+    """
+    Holds in-flight / finished post-execution summaries by summary id.
+
+    Entries are futures (concurrent.futures.Future or asyncio.Task),
+    bounded in number and expired after a TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[object, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, future) -> str:
+        summary_id = str(uuid.uuid4())
+
+        with self._lock:
+            self._entries[summary_id] = (future, time.monotonic())
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return summary_id
+
+    def get(self, summary_id: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(summary_id)
+
+            if entry is None:
+                return None
+
+            future, created_at = entry
+            if time.monotonic() - created_at > self.ttl_seconds:
+                del self._entries[summary_id]
+                return None
+
+        if not future.done():
+            return {"summary_id": summary_id, "status": "pending", "summary": None}
+
+        try:
+            error = future.exception()
+        except (asyncio.CancelledError, Exception) as e:
+            error = e
+
+        if error is not None:
+            return {
+                "summary_id": summary_id,
+                "status": "failed",
+                "summary": None,
+                "error": str(error) or type(error).__name__,
+            }
+
+        return {"summary_id": summary_id, "status": "ready", "summary": future.result()}
+
+
+@lru_cache(maxsize=1)
+def get_summary_store() -> DeferredSummaryStore:
+    """
+    Process-wide deferred summary store built from settings.
+    """
+    return DeferredSummaryStore(
+        max_entries=settings.summary_store_max_entries,
+        ttl_seconds=settings.summary_store_ttl_seconds,
+    )
@@ -1,8 +1,132 @@
+import asyncio
 import time
 import uuid
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Sequence
 
 from text_to_sql_agent.sql_tools.sql_tools import HardTermination
+from text_to_sql_agent.runtime.metrics import observe_request, retry_path
+from text_to_sql_agent.caching.result_cache import get_result_cache
+from text_to_sql_agent.caching.sql_templates import get_template_cache
+from text_to_sql_agent.grounding.example_store import get_example_store
+from text_to_sql_agent.caching.question_cache import (
+    get_question_cache,
+    normalize_question,
+)
+
+
+def _build_metadata(final_state: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+    """
+    Build response metadata from whatever graph state is available.
+    """
+    latency_ms = int((time.time() - start_time) * 1000)
+
+    metadata = {
+        "latency_ms": latency_ms,
+        "retry_count": final_state.get("retry_count"),
+        "execution_mode": final_state.get("execution_mode"),
+        "retry_reason": final_state.get("retry_reason"),
+        "termination_reason": final_state.get("termination_reason"),
+        "last_error_type": final_state.get("last_error_type"),
+    }
+
+    if final_state.get("schema_retrieval"):
+        metadata["schema_retrieval"] = final_state["schema_retrieval"]
+
+    if final_state.get("node_timings"):
+        metadata["timings"] = {
+            "nodes": final_state["node_timings"],
+            "db_execution_ms": final_state.get("db_execution_ms"),
+            "rows_returned": final_state.get("rows_returned"),
+        }
+        metadata["retry_path"] = retry_path(final_state["node_timings"])
+
+    if final_state.get("prompt_usage"):
+        metadata["prompt_usage"] = final_state["prompt_usage"]
+
+    cache = get_question_cache()
+    if cache is not None:
+        metadata["sql_cache"] = {
+            "hit": bool(final_state.get("sql_cache_hit")),
+            **cache.stats(),
+        }
+
+    templates = get_template_cache()
+    if templates is not None and final_state.get("sql_template_key"):
+        metadata["sql_template"] = {
+            "hit": bool(final_state.get("sql_template_hit")),
+            "params": final_state.get("sql_params"),
+            **templates.stats(),
+        }
+
+    if final_state.get("query_plan"):
+        metadata["query_plan"] = final_state["query_plan"]
+
+    if final_state.get("sql_candidates"):
+        metadata["sql_candidates"] = final_state["sql_candidates"]
+
+    examples = get_example_store()
+    if examples is not None and "generate_sql" in metadata.get("retry_path", ()):
+        metadata["few_shot"] = {
+            "examples": [e.report() for e in final_state.get("few_shot_examples") or []],
+            **examples.stats(),
+        }
+
+    result_cache = get_result_cache()
+    if result_cache is not None and final_state.get("sql_query"):
+        metadata["result_cache"] = {
+            "hit": bool(final_state.get("result_cache_hit")),
+            **result_cache.stats(),
+        }
+
+    return metadata
+
+
+def _success_response(
+    request_id: str,
+    final_state: Dict[str, Any],
+    start_time: float,
+) -> Dict[str, Any]:
+    observe_request(final_state, time.time() - start_time, success=True)
+
+    response = {
+        "version": "v1",
+        "request_id": request_id,
+        "success": True,
+        "result": final_state.get("final_answer"),
+        "metadata": _build_metadata(final_state, start_time),
+    }
+
+    # --- additive, non-breaking fields ---
+    if "post_execution_summary" in final_state:
+        response["post_execution_summary"] = final_state["post_execution_summary"]
+
+    if "invoked_tools" in final_state:
+        response["invoked_tools"] = final_state["invoked_tools"]
+
+    return response
+
+
+def _error_response(
+    request_id: str,
+    message: str,
+    final_state: Dict[str, Any],
+    start_time: float,
+) -> Dict[str, Any]:
+    observe_request(final_state, time.time() - start_time, success=False)
+
+    return {
+        "version": "v1",
+        "request_id": request_id,
+        "success": False,
+        "result": {
+            "type": "error",
+            "message": message,
+        },
+        "metadata": _build_metadata(final_state, start_time),
+    }
+
+
+INTERNAL_ERROR_MESSAGE = "An internal error occurred while processing the query."
 
 
 def safe_execute_graph(
@@ -21,71 +145,231 @@ def safe_execute_graph(
 
     try:
         final_state = graph.invoke(state) or {}
+        return _success_response(request_id, final_state, start_time)
 
-        latency_ms = int((time.time() - start_time) * 1000)
-
-        response = {
-            "version": "v1",
-            "request_id": request_id,
-            "success": True,
-            "result": final_state.get("final_answer"),
-            "metadata": {
-                "latency_ms": latency_ms,
-                "retry_count": final_state.get("retry_count"),
-                "execution_mode": final_state.get("execution_mode"),
-                "retry_reason": final_state.get("retry_reason"),
-                "termination_reason": final_state.get("termination_reason"),
-                "last_error_type": final_state.get("last_error_type"),
-            },
-        }
+    except HardTermination as e:
+        return _error_response(request_id, str(e), final_state, start_time)
+
+    except Exception:
+        return _error_response(
+            request_id, INTERNAL_ERROR_MESSAGE, final_state, start_time
+        )
+
+
+async def asafe_execute_graph(
+    graph,
+    state,
+) -> Dict[str, Any]:
+    """
+    Async variant of safe_execute_graph.
+    This is the ONLY place where graph.ainvoke() should be called.
+    """
 
-        # --- additive, non-breaking fields ---
-        if "post_execution_summary" in final_state:
-            response["post_execution_summary"] = final_state["post_execution_summary"]
+    request_id = str(uuid.uuid4())
+    start_time = time.time()
 
-        if "invoked_tools" in final_state:
-            response["invoked_tools"] = final_state["invoked_tools"]
+    final_state: Dict[str, Any] = {}
 
-        return response
+    try:
+        final_state = await graph.ainvoke(state) or {}
+        return _success_response(request_id, final_state, start_time)
 
     except HardTermination as e:
-        latency_ms = int((time.time() - start_time) * 1000)
-
-        return {
-            "version": "v1",
-            "request_id": request_id,
-            "success": False,
-            "result": {
-                "type": "error",
-                "message": str(e),
-            },
-            "metadata": {
-                "latency_ms": latency_ms,
-                "retry_count": final_state.get("retry_count"),
-                "execution_mode": final_state.get("execution_mode"),
-                "retry_reason": final_state.get("retry_reason"),
-                "termination_reason": final_state.get("termination_reason"),
-                "last_error_type": final_state.get("last_error_type"),
-            },
-        }
+        return _error_response(request_id, str(e), final_state, start_time)
 
     except Exception:
-        latency_ms = int((time.time() - start_time) * 1000)
-
-        return {
-            "version": "v1",
-            "request_id": request_id,
-            "success": False,
-            "result": {
-                "type": "error",
-                "message": "An internal error occurred while processing the query.",
-            },
-            "metadata": {
-                "latency_ms": latency_ms,
-                "retry_count": final_state.get("retry_count"),
-                "execution_mode": final_state.get("execution_mode"),
-                "retry_reason": final_state.get("retry_reason"),
-                "termination_reason": final_state.get("termination_reason"),
-                "last_error_type": final_state.get("last_error_type"),
+        return _error_response(
+            request_id, INTERNAL_ERROR_MESSAGE, final_state, start_time
+        )
+
+
+# ============================================================
+# Batch execution
+# ============================================================
+def _batch_key(state) -> tuple:
+    # Questions that differ only in case / punctuation share one run
+    return (
+        state.database_id,
+        normalize_question(state.user_query),
+        state.summary_mode,
+    )
+
+
+async def abatch_execute_graph(
+    graph,
+    states: Sequence[Any],
+    max_concurrency: int,
+) -> list[Dict[str, Any]]:
+    """
+    Run many graph states concurrently (bounded), deduplicating
+    identical questions.
+
+    Returns one safe_execute_graph-shaped response per input state,
+    in input order; duplicates share the response of their first
+    occurrence.
+    """
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+    unique: dict[tuple, Any] = {}
+
+    for state in states:
+        unique.setdefault(_batch_key(state), state)
+
+    async def _run(state):
+        async with semaphore:
+            return await asafe_execute_graph(graph, state)
+
+    keys = list(unique)
+    responses = await asyncio.gather(*(_run(unique[key]) for key in keys))
+    by_key = dict(zip(keys, responses))
+
+    return [by_key[_batch_key(state)] for state in states]
+
+
+# ============================================================
+# Streaming execution
+# ============================================================
+# Answer types whose data is the result rows (already sent as "rows")
+_ROW_ANSWERS = {"table", "time_series", "list"}
+
+
+def answer_event(final_answer: Dict[str, Any] | None) -> Dict[str, Any]:
+    """
+    Client "answer" event: the final answer without its summary (sent
+    last, as "summary") and with row data replaced by its row count.
+    """
+    answer = dict(final_answer or {})
+    answer.pop("summary", None)
+
+    if answer.get("type") in _ROW_ANSWERS and isinstance(answer.get("data"), list):
+        answer["row_count"] = len(answer.pop("data"))
+
+    return {"event": "answer", "answer": answer}
+
+
+def _node_events(
+    node: str,
+    update: Dict[str, Any],
+    answer_sent: bool = False,
+) -> list[Dict[str, Any]]:
+    """
+    Translate one node's state update into client-facing progress events.
+    answer_sent: final_response already streamed its answer (before
+    awaiting the summary).
+    """
+    update = update or {}
+
+    if node == "route":
+        return [{"event": "routed", "execution_mode": update.get("execution_mode")}]
+
+    if node == "lookup_cached_sql" and update.get("sql_cache_hit"):
+        return [
+            {"event": "sql_cache_hit", "sql": update.get("sql_query")},
+            {"event": "executing"},
+        ]
+
+    if node == "lookup_cached_sql" and update.get("sql_template_hit"):
+        return [
+            {
+                "event": "sql_template_hit",
+                "sql": update.get("sql_query"),
+                "params": update.get("sql_params"),
             },
-        }
+            {"event": "executing"},
+        ]
+
+    if node == "retrieve_schema" and update.get("schema_retrieval"):
+        return [{"event": "schema_selected", **update["schema_retrieval"]}]
+
+    if node == "generate_sql":
+        return [{"event": "sql_generated", "sql": update.get("sql_query")}]
+
+    if node == "repair_sql":
+        return [{"event": "sql_repaired", "sql": update.get("sql_query")}]
+
+    if node == "validate_sql":
+        events = [{
+            "event": "validated",
+            "valid": bool(update.get("sql_valid")),
+            "error": update.get("validation_error"),
+        }]
+        if update.get("sql_valid"):
+            events.append({"event": "executing"})
+        return events
+
+    if node == "execute_sql":
+        rows = update.get("execution_result")
+        return [{
+            "event": "executed",
+            "row_count": len(rows) if rows is not None else None,
+            "termination_reason": update.get("termination_reason"),
+        }]
+
+    if node == "final_response":
+        final_answer = update.get("final_answer") or {}
+        events = [] if answer_sent else [answer_event(final_answer)]
+
+        # Summary is always the LAST content event
+        events.append({"event": "summary", "summary": final_answer.get("summary")})
+        return events
+
+    return []
+
+
+async def astream_execute_graph(
+    graph,
+    state,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of asafe_execute_graph.
+
+    Yields node-level progress events as the graph runs, result rows
+    in chunks as they are fetched, then the answer (rows replaced by
+    their count) as soon as it is formatted, the summary, and a
+    terminal "done" event carrying the usual response metadata.
+    Never raises: failures are reported as an "error" event.
+    """
+
+    request_id = str(uuid.uuid4())
+    start_time = time.time()
+
+    final_state: Dict[str, Any] = {}
+    success = True
+    answer_sent = False
+
+    yield {"event": "accepted", "request_id": request_id}
+
+    try:
+        async for mode, chunk in graph.astream(
+            state, stream_mode=["updates", "custom", "values"]
+        ):
+            if mode == "values":
+                final_state = chunk
+            elif mode == "custom":
+                answer_sent = answer_sent or chunk.get("event") == "answer"
+                yield chunk
+            else:
+                for node, update in chunk.items():
+                    for event in _node_events(node, update, answer_sent):
+                        yield event
+
+    except HardTermination as e:
+        success = False
+        yield {"event": "error", "message": str(e)}
+
+    except Exception:
+        success = False
+        yield {"event": "error", "message": INTERNAL_ERROR_MESSAGE}
+
+    observe_request(final_state, time.time() - start_time, success)
+
+    done = {
+        "event": "done",
+        "request_id": request_id,
+        "success": success,
+        "metadata": _build_metadata(final_state, start_time),
+    }
+
+    if "invoked_tools" in final_state:
+        done["invoked_tools"] = final_state["invoked_tools"]
+
+    yield done
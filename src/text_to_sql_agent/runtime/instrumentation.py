@@ -0,0 +1,80 @@
+import time
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from text_to_sql_agent.runtime.metrics import observe_node
+
+
+def _with_timing(name: str, state, update, seconds: float):
+    """
+    Append this node's wall time to state.node_timings.
+    """
+    entry = {"node": name, "ms": round(seconds * 1000, 3)}
+    timings = list(state.node_timings) + [entry]
+
+    if update is None:
+        return {"node_timings": timings}
+
+    if isinstance(update, dict):
+        return {**update, "node_timings": timings}
+
+    # Node returned the (mutated) state object itself
+    update.node_timings = timings
+    return update
+
+
+def instrument_node(name: str, func, afunc=None) -> RunnableLambda:
+    """
+    Wrap a graph node so every run records its wall time
+    (Prometheus histogram + GraphState.node_timings).
+
+    Args:
+        name: Node name (metric label).
+        func: Sync node function, or a Runnable node.
+        afunc: Optional async twin of func. Without it the sync
+            function runs inline under ainvoke(), as before.
+
+    Returns:
+        RunnableLambda supporting both invoke() and ainvoke().
+    """
+
+    if isinstance(func, Runnable):
+        runnable = func
+
+        def _call(state, config: RunnableConfig):
+            return runnable.invoke(state, config)
+
+        async def _acall(state, config: RunnableConfig):
+            return await runnable.ainvoke(state, config)
+
+    else:
+
+        def _call(state, config: RunnableConfig):
+            return func(state)
+
+        async def _acall(state, config: RunnableConfig):
+            if afunc is None:
+                return func(state)
+            return await afunc(state)
+
+    def _node(state, config: RunnableConfig):
+        start = time.perf_counter()
+        try:
+            update = _call(state, config)
+        finally:
+            elapsed = time.perf_counter() - start
+            observe_node(name, elapsed)
+
+        return _with_timing(name, state, update, elapsed)
+
+    async def _anode(state, config: RunnableConfig):
+        start = time.perf_counter()
+        try:
+            update = await _acall(state, config)
+        finally:
+            elapsed = time.perf_counter() - start
+            observe_node(name, elapsed)
+
+        return _with_timing(name, state, update, elapsed)
+
+    return RunnableLambda(_node, afunc=_anode, name=name)
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any
+
+
+class BatchingChatModel:
+    """
+    Coalesces concurrent ainvoke() calls into one abatch() call on the
+    wrapped LangChain ChatModel.
+
+    Calls arriving within max_wait_seconds of each other (or until
+    max_batch_size is reached) are dispatched together, so providers
+    with native batching get one request instead of N. Providers
+    without it fall back to LangChain's default abatch (concurrent
+    ainvoke), which is no worse than calling them one by one.
+
+    Everything else (invoke, bind_tools, ...) is delegated unchanged.
+    One instance belongs to one event loop (e.g. one batch request).
+    """
+
+    def __init__(self, llm, max_batch_size: int = 16, max_wait_seconds: float = 0.02):
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._dispatches: set[asyncio.Task] = set()
+        self.batches = 0
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        if config is not None or kwargs:
+            # Per-call options cannot be shared across a batch
+            return await self.llm.ainvoke(messages, config, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((messages, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list[tuple[Any, asyncio.Future]]):
+        self.batches += 1
+        self.calls += len(batch)
+
+        try:
+            results = await self.llm.abatch(
+                [messages for messages, _ in batch],
+                return_exceptions=True,
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {"llm_calls": self.calls, "llm_batches": self.batches}
@@ -0,0 +1,217 @@
+from typing import Any, Dict
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# Dedicated registry: only this service's metrics, safe across reloads
+REGISTRY = CollectorRegistry()
+
+# Node / request latencies span ~0.1 ms (routing) to tens of seconds (LLM)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 250, 500, 1000)
+
+NODE_DURATION = Histogram(
+    "text_to_sql_node_duration_seconds",
+    "Wall time per graph node.",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+REQUEST_DURATION = Histogram(
+    "text_to_sql_request_duration_seconds",
+    "End-to-end graph run time.",
+    ["execution_mode", "outcome"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+REQUESTS = Counter(
+    "text_to_sql_requests_total",
+    "Graph runs by execution mode and answer type.",
+    ["execution_mode", "answer_type"],
+    registry=REGISTRY,
+)
+
+LLM_TOKENS = Counter(
+    "text_to_sql_llm_tokens_total",
+    "LLM tokens reported by the provider.",
+    ["node", "kind"],
+    registry=REGISTRY,
+)
+
+LLM_CALLS = Counter(
+    "text_to_sql_llm_calls_total",
+    "LLM calls per node.",
+    ["node"],
+    registry=REGISTRY,
+)
+
+DB_EXECUTION = Histogram(
+    "text_to_sql_db_execution_seconds",
+    "SQL execution time (database only).",
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+ROWS_RETURNED = Histogram(
+    "text_to_sql_rows_returned",
+    "Rows returned per executed query.",
+    buckets=ROW_BUCKETS,
+    registry=REGISTRY,
+)
+
+RETRIES = Counter(
+    "text_to_sql_retries_total",
+    "SQL retries by path (repair / regenerate).",
+    ["path"],
+    registry=REGISTRY,
+)
+
+RESULT_CACHE_LOOKUPS = Counter(
+    "text_to_sql_result_cache_lookups_total",
+    "Result cache lookups by outcome (memory_hit / disk_hit / miss / stale).",
+    ["outcome"],
+    registry=REGISTRY,
+)
+
+RESULT_CACHE_BYTES = Gauge(
+    "text_to_sql_result_cache_bytes",
+    "Bytes held by the result cache per tier.",
+    ["tier"],
+    registry=REGISTRY,
+)
+
+FEW_SHOT_LOOKUPS = Counter(
+    "text_to_sql_few_shot_lookups_total",
+    "Few-shot example retrievals by outcome (hit / miss).",
+    ["outcome"],
+    registry=REGISTRY,
+)
+
+SQL_CANDIDATES = Counter(
+    "text_to_sql_sql_candidates_total",
+    "Speculative SQL candidates by validation outcome.",
+    ["outcome"],
+    registry=REGISTRY,
+)
+
+PLAN_GATE = Counter(
+    "text_to_sql_plan_gate_total",
+    "Query plan gate decisions (pass / flagged / rejected).",
+    ["outcome"],
+    registry=REGISTRY,
+)
+
+FIRST_PASS_VALIDATIONS = Counter(
+    "text_to_sql_first_pass_validations_total",
+    "First validation of generated SQL, by outcome and few-shot use.",
+    ["outcome", "few_shot"],
+    registry=REGISTRY,
+)
+
+
+# ============================================================
+# Recording helpers
+# ============================================================
+def observe_node(node: str, seconds: float):
+    NODE_DURATION.labels(node=node).observe(seconds)
+
+
+def observe_llm_usage(usage: Dict[str, Any]):
+    """
+    Count one LLM call from an extract_prompt_usage() dict (with "node").
+    """
+    node = usage.get("node", "unknown")
+    LLM_CALLS.labels(node=node).inc()
+
+    for kind in ("prompt", "completion", "cached_prompt"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            LLM_TOKENS.labels(node=node, kind=kind).inc(tokens)
+
+
+def observe_db_execution(seconds: float, rows: int | None):
+    DB_EXECUTION.observe(seconds)
+
+    if rows is not None:
+        ROWS_RETURNED.observe(rows)
+
+
+def observe_result_cache(outcome: str):
+    RESULT_CACHE_LOOKUPS.labels(outcome=outcome).inc()
+
+
+def set_result_cache_bytes(tier: str, nbytes: int):
+    RESULT_CACHE_BYTES.labels(tier=tier).set(nbytes)
+
+
+def observe_few_shot(hit: bool):
+    FEW_SHOT_LOOKUPS.labels(outcome="hit" if hit else "miss").inc()
+
+
+def observe_sql_candidates(report: list[dict]):
+    for candidate in report:
+        SQL_CANDIDATES.labels(
+            outcome="valid" if candidate["valid"] else "invalid"
+        ).inc()
+
+
+def observe_plan_gate(outcome: str):
+    PLAN_GATE.labels(outcome=outcome).inc()
+
+
+def observe_first_pass_validation(valid: bool, few_shot: bool):
+    FIRST_PASS_VALIDATIONS.labels(
+        outcome="valid" if valid else "invalid",
+        few_shot=str(few_shot).lower(),
+    ).inc()
+
+
+def retry_path(node_timings: list[dict]) -> list[str]:
+    """
+    Ordered node names of one run, e.g.
+    generate_sql → validate_sql → repair_sql → validate_sql → execute_sql.
+    """
+    return [timing["node"] for timing in node_timings]
+
+
+def observe_request(final_state: Dict[str, Any], seconds: float, success: bool):
+    execution_mode = final_state.get("execution_mode") or "unknown"
+    answer = final_state.get("final_answer") or {}
+
+    REQUEST_DURATION.labels(
+        execution_mode=execution_mode,
+        outcome="success" if success else "error",
+    ).observe(seconds)
+
+    REQUESTS.labels(
+        execution_mode=execution_mode,
+        answer_type=answer.get("type") or "none",
+    ).inc()
+
+    path = retry_path(final_state.get("node_timings") or [])
+
+    repairs = path.count("repair_sql")
+    regenerations = max(path.count("generate_sql") - 1, 0)
+
+    if repairs:
+        RETRIES.labels(path="repair").inc(repairs)
+    if regenerations:
+        RETRIES.labels(path="regenerate").inc(regenerations)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Prometheus text exposition of all service metrics.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
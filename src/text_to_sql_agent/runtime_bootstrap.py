@@ -1,24 +1,52 @@
-from text_to_sql_agent.db import engine
+from text_to_sql_agent.db_registry import get_database_registry
 from text_to_sql_agent.schema_analysis import (
-    analyze_schema,
+    compute_schema_fingerprint,
     infer_fact_and_dimension_tables,
 )
+from text_to_sql_agent.schema_catalog import SchemaCatalog
 
-import hashlib
-import json
+__all__ = [
+    "compute_schema_fingerprint",
+    "load_runtime_schema",
+    "get_runtime_catalog",
+    "get_schema_fingerprint",
+]
 
-TABLES, FOREIGN_KEYS = analyze_schema(engine)
-FACT_TABLES, DIM_TABLES = infer_fact_and_dimension_tables(TABLES, FOREIGN_KEYS)
 
-def compute_schema_fingerprint(tables, foreign_keys) -> str:
-    payload = {
-        "tables": {
-            t: sorted(list(meta["columns"]))
-            for t, meta in tables.items()
-        },
-        "foreign_keys": foreign_keys,
-    }
-    raw = json.dumps(payload, sort_keys=True)
-    return hashlib.sha256(raw.encode()).hexdigest()
+def load_runtime_schema(database_id: str | None = None) -> tuple[dict, dict, str]:
+    """
+    (tables, foreign_keys, fingerprint) of a served database
+    (default database when database_id is None).
 
-SCHEMA_FINGERPRINT = compute_schema_fingerprint(TABLES, FOREIGN_KEYS)
+    Loaded on first use, not at import, from the persisted snapshot
+    when it is still valid (see DatabaseHandle.schema).
+    """
+    return get_database_registry().get(database_id).schema()
+
+
+def get_runtime_catalog(database_id: str | None = None) -> SchemaCatalog:
+    """
+    Schema catalog of a served database (lazy, shared per schema).
+    """
+    return get_database_registry().get(database_id).catalog
+
+
+def get_schema_fingerprint(database_id: str | None = None) -> str:
+    return get_database_registry().get(database_id).fingerprint
+
+
+def __getattr__(name: str):
+    # Legacy module constants (default database), resolved lazily
+    if name == "TABLES":
+        return load_runtime_schema()[0]
+    if name == "FOREIGN_KEYS":
+        return load_runtime_schema()[1]
+    if name == "SCHEMA_FINGERPRINT":
+        return get_schema_fingerprint()
+    if name == "SCHEMA_CATALOG":
+        return get_runtime_catalog()
+    if name in ("FACT_TABLES", "DIM_TABLES"):
+        fact, dim = infer_fact_and_dimension_tables(*load_runtime_schema()[:2])
+        return fact if name == "FACT_TABLES" else dim
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
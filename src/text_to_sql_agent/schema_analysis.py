@@ -1,10 +1,107 @@
-from sqlalchemy import text
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
 from collections import defaultdict
+import hashlib
+import json
+
+# ============================================================
+# Bulk SQLite introspection (table-valued PRAGMA functions)
+# ============================================================
+_SQLITE_COLUMNS = text("""
+    SELECT m.name, p.name, p.pk
+    FROM sqlite_master AS m
+    JOIN pragma_table_info(m.name) AS p
+    WHERE m.type = 'table'
+      AND m.name NOT LIKE 'sqlite_%'
+    ORDER BY m.rowid, p.cid
+""")
+
+_SQLITE_FOREIGN_KEYS = text("""
+    SELECT m.name, f."from", f."table", f."to"
+    FROM sqlite_master AS m
+    JOIN pragma_foreign_key_list(m.name) AS f
+    WHERE m.type = 'table'
+      AND m.name NOT LIKE 'sqlite_%'
+    ORDER BY m.rowid, f.id, f.seq
+""")
+
+
+def _analyze_sqlite_bulk(conn):
+    """
+    Whole schema in two set-based queries instead of 2N+1 PRAGMAs.
+    """
+    tables = {}
+    foreign_keys = defaultdict(list)
+
+    for table_name, col_name, pk in conn.execute(_SQLITE_COLUMNS):
+        meta = tables.setdefault(
+            table_name.lower(), {"columns": set(), "primary_keys": set()}
+        )
+        meta["columns"].add(col_name.lower())
+        if pk == 1:
+            meta["primary_keys"].add(col_name.lower())
+
+    for table_name, fk_col, ref_table, ref_col in conn.execute(_SQLITE_FOREIGN_KEYS):
+        if ref_col is None:
+            # REFERENCES parent without a column → parent's primary key
+            ref_pks = tables.get(ref_table.lower(), {}).get("primary_keys")
+            ref_col = next(iter(sorted(ref_pks)), "") if ref_pks else ""
+
+        foreign_keys[table_name.lower()].append(
+            (fk_col.lower(), ref_table.lower(), ref_col.lower())
+        )
+
+    return tables, foreign_keys
+
+
+# ============================================================
+# Dialect-agnostic fallback (SQLAlchemy inspector)
+# ============================================================
+def _analyze_with_inspector(engine):
+    """
+    Reflect the schema with SQLAlchemy's multi-table reflection API.
+    The inspector's info cache makes repeated lookups free, and
+    dialects with bulk reflection issue one query per kind.
+    """
+    inspector = inspect(engine)
+
+    tables = {}
+    foreign_keys = defaultdict(list)
+
+    table_names = [
+        name for name in inspector.get_table_names()
+        if not name.startswith("sqlite_")
+    ]
+    columns = inspector.get_multi_columns(filter_names=table_names)
+    pks = inspector.get_multi_pk_constraint(filter_names=table_names)
+    fks = inspector.get_multi_foreign_keys(filter_names=table_names)
+
+    for table_name in table_names:
+        key = (None, table_name)
+        pk_cols = (pks.get(key) or {}).get("constrained_columns") or []
+
+        tables[table_name.lower()] = {
+            "columns": {c["name"].lower() for c in columns.get(key, [])},
+            "primary_keys": {pk_cols[0].lower()} if pk_cols else set(),
+        }
+
+        for fk in fks.get(key, []):
+            for fk_col, ref_col in zip(fk["constrained_columns"], fk["referred_columns"]):
+                foreign_keys[table_name.lower()].append(
+                    (fk_col.lower(), fk["referred_table"].lower(), ref_col.lower())
+                )
+
+    return tables, foreign_keys
+
 
 def analyze_schema(engine):
     """
     Introspect the database schema.
 
+    SQLite uses two bulk queries over the table-valued PRAGMA functions;
+    other dialects (or SQLite builds without them) fall back to the
+    SQLAlchemy inspector.
+
     Args:
         engine: SQLAlchemy engine.
 
@@ -12,43 +109,25 @@ def analyze_schema(engine):
         tables: Mapping of table -> columns and primary keys.
         foreign_keys: Mapping of table -> foreign key relationships.
     """
-    tables = {}
-    foreign_keys = defaultdict(list)
+    if engine.dialect.name == "sqlite":
+        try:
+            with engine.connect() as conn:
+                return _analyze_sqlite_bulk(conn)
+        except DBAPIError:
+            pass
 
-    with engine.connect() as conn:
-        table_rows = conn.execute(text("""
-            SELECT name
-            FROM sqlite_master
-            WHERE type='table'
-              AND name NOT LIKE 'sqlite_%'
-        """)).fetchall()
-
-        for (table_name,) in table_rows:
-            tables[table_name.lower()] = {
-                "columns": set(),
-                "primary_keys": set(),
-            }
-
-            cols = conn.execute(
-                text(f'PRAGMA table_info("{table_name}")')
-            ).fetchall()
-
-            for col in cols:
-                col_name = col[1].lower()
-                tables[table_name.lower()]["columns"].add(col_name)
-                if col[5] == 1:
-                    tables[table_name.lower()]["primary_keys"].add(col_name)
-
-            fks = conn.execute(
-                text(f'PRAGMA foreign_key_list("{table_name}")')
-            ).fetchall()
-
-            for fk in fks:
-                foreign_keys[table_name.lower()].append(
-                    (fk[3].lower(), fk[2].lower(), fk[4].lower())
-                )
+    return _analyze_with_inspector(engine)
 
-    return tables, foreign_keys
+def compute_schema_fingerprint(tables, foreign_keys) -> str:
+    payload = {
+        "tables": {
+            t: sorted(list(meta["columns"]))
+            for t, meta in tables.items()
+        },
+        "foreign_keys": foreign_keys,
+    }
+    raw = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
 
 def extract_schema_entities(tables: dict) -> set[str]:
     """
@@ -83,6 +162,74 @@ def extract_schema_entities(tables: dict) -> set[str]:
 
     return entities
 
+# Rowid tables (max(rowid) works) + whether ANALYZE statistics exist
+_SQLITE_SIZED_TABLES = text("""
+    SELECT name FROM sqlite_master
+    WHERE type = 'table'
+      AND (
+        name = 'sqlite_stat1'
+        OR (
+          name NOT LIKE 'sqlite_%'
+          AND sql NOT LIKE 'CREATE VIRTUAL TABLE%'
+          AND sql NOT LIKE '%WITHOUT ROWID%'
+        )
+      )
+""")
+
+# SQLITE_MAX_COMPOUND_SELECT default
+_COMPOUND_SELECT_LIMIT = 500
+
+
+def _quote_identifier(name: str) -> str:
+    escaped = name.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def estimate_table_rows(engine) -> dict[str, int]:
+    """
+    Approximate row count per table (lowercase names), without
+    counting rows, in a fixed number of statements.
+
+    Uses sqlite_stat1 (written by ANALYZE) when present, else
+    max(rowid) (one index lookup; overestimates after deletes), all
+    tables in one UNION ALL. Non-SQLite engines and WITHOUT ROWID /
+    virtual tables are left out.
+    """
+    if engine.dialect.name != "sqlite":
+        return {}
+
+    rows: dict[str, int] = {}
+
+    with engine.connect() as conn:
+        names = [name for (name,) in conn.execute(_SQLITE_SIZED_TABLES)]
+
+        if "sqlite_stat1" in names:
+            names.remove("sqlite_stat1")
+            for table, stat in conn.execute(text("SELECT tbl, stat FROM sqlite_stat1")):
+                try:
+                    count = int(str(stat).split()[0])
+                except (ValueError, IndexError):
+                    continue
+                rows[table.lower()] = max(rows.get(table.lower(), 0), count)
+
+        missing = [name for name in names if name.lower() not in rows]
+
+        for start in range(0, len(missing), _COMPOUND_SELECT_LIMIT):
+            chunk = missing[start:start + _COMPOUND_SELECT_LIMIT]
+            union = " UNION ALL ".join(
+                f"SELECT :t{i}, max(rowid) FROM {_quote_identifier(name)}"
+                for i, name in enumerate(chunk)
+            )
+            params = {f"t{i}": name for i, name in enumerate(chunk)}
+
+            try:
+                for table, count in conn.execute(text(union), params):
+                    rows[table.lower()] = count or 0
+            except DBAPIError:
+                continue
+
+    return rows
+
 def infer_fact_and_dimension_tables(tables, foreign_keys):
     """
     Infer FACT and DIMENSION tables using foreign key presence.
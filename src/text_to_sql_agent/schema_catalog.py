@@ -0,0 +1,120 @@
+import weakref
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from text_to_sql_agent.schema_analysis import (
+    build_schema_context,
+    extract_schema_entities,
+    infer_fact_and_dimension_tables,
+)
+
+
+@dataclass(frozen=True)
+class SchemaCatalog:
+    """
+    Immutable, precomputed view of one schema version.
+
+    Everything that hot paths need from the schema is derived ONCE
+    here, so per-request work never depends on schema size.
+    """
+
+    fingerprint: str
+
+    # --- Raw schema (read-only views) ---
+    table_columns: Mapping[str, frozenset[str]]
+    primary_keys: Mapping[str, frozenset[str]]
+    foreign_keys: Mapping[str, tuple[tuple[str, str, str], ...]]
+
+    # --- Prompt grounding ---
+    schema_context: str
+    schema_entities: frozenset[str]
+
+    # --- Join validation ---
+    fk_pairs: frozenset[tuple[str, str, str, str]]
+    join_graph: Mapping[str, frozenset[str]]
+
+    # --- Table roles ---
+    fact_tables: frozenset[str]
+    dimension_tables: frozenset[str]
+
+
+def build_schema_catalog(
+    tables: dict,
+    foreign_keys: dict,
+    fingerprint: str,
+) -> SchemaCatalog:
+    """
+    Derive every schema artifact used at request time.
+
+    Args:
+        tables: Table metadata from analyze_schema.
+        foreign_keys: Foreign key mapping from analyze_schema.
+        fingerprint: Schema fingerprint identifying this version.
+
+    Returns:
+        SchemaCatalog for the given schema.
+    """
+    fk_pairs = set()
+    join_graph: dict[str, set[str]] = {}
+
+    for table, fks in foreign_keys.items():
+        for fk_col, ref_table, ref_col in fks:
+            # Bidirectional: joins are valid in either direction
+            fk_pairs.add((table, fk_col, ref_table, ref_col))
+            fk_pairs.add((ref_table, ref_col, table, fk_col))
+
+            join_graph.setdefault(table, set()).add(ref_table)
+            join_graph.setdefault(ref_table, set()).add(table)
+
+    fact_tables, dimension_tables = infer_fact_and_dimension_tables(
+        tables, foreign_keys
+    )
+
+    return SchemaCatalog(
+        fingerprint=fingerprint,
+        table_columns=MappingProxyType({
+            t: frozenset(meta.get("columns", ()))
+            for t, meta in tables.items()
+        }),
+        primary_keys=MappingProxyType({
+            t: frozenset(meta.get("primary_keys", ()))
+            for t, meta in tables.items()
+        }),
+        foreign_keys=MappingProxyType({
+            t: tuple(fks) for t, fks in foreign_keys.items()
+        }),
+        schema_context=build_schema_context(tables, foreign_keys),
+        schema_entities=frozenset(extract_schema_entities(tables)),
+        fk_pairs=frozenset(fk_pairs),
+        join_graph=MappingProxyType({
+            t: frozenset(neighbours) for t, neighbours in join_graph.items()
+        }),
+        fact_tables=frozenset(fact_tables),
+        dimension_tables=frozenset(dimension_tables),
+    )
+
+
+# ============================================================
+# Catalog cache (one catalog per schema fingerprint)
+# ============================================================
+# Weak: a catalog lives as long as some database handle uses it, and
+# databases with identical schemas share one
+_CATALOGS: "weakref.WeakValueDictionary[str, SchemaCatalog]" = weakref.WeakValueDictionary()
+
+
+def get_schema_catalog(
+    tables: dict,
+    foreign_keys: dict,
+    fingerprint: str,
+) -> SchemaCatalog:
+    """
+    Return the catalog for a fingerprint, building it only once.
+    """
+    catalog = _CATALOGS.get(fingerprint)
+
+    if catalog is None:
+        catalog = build_schema_catalog(tables, foreign_keys, fingerprint)
+        _CATALOGS[fingerprint] = catalog
+
+    return catalog
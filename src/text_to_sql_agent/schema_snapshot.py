@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import text
+
+from text_to_sql_agent.schema_analysis import analyze_schema, compute_schema_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes
+SNAPSHOT_FORMAT = 1
+
+
+def schema_identity(engine, db_path: Path) -> dict:
+    """
+    Identity of the database file + its schema version.
+
+    PRAGMA schema_version changes on every DDL statement, and the
+    device / inode pair changes when the file is replaced, so data-only
+    writes keep the snapshot valid while schema changes invalidate it.
+    """
+    stat = os.stat(db_path)
+
+    with engine.connect() as conn:
+        schema_version = conn.execute(text("PRAGMA schema_version")).scalar()
+
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "path": str(Path(db_path).resolve()),
+        "device": stat.st_dev,
+        "inode": stat.st_ino,
+        "schema_version": schema_version,
+    }
+
+
+def load_schema_snapshot(path: str | None, identity: dict):
+    """
+    Returns (tables, foreign_keys, fingerprint), or None when there is
+    no usable snapshot for this identity.
+    """
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+
+        if snapshot.get("identity") != identity:
+            return None
+
+        tables = {
+            table: {
+                "columns": set(meta["columns"]),
+                "primary_keys": set(meta["primary_keys"]),
+            }
+            for table, meta in snapshot["tables"].items()
+        }
+        foreign_keys = {
+            table: [tuple(fk) for fk in fks]
+            for table, fks in snapshot["foreign_keys"].items()
+        }
+
+        return tables, foreign_keys, snapshot["fingerprint"]
+
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable schema snapshot {path}: {e}")
+        return None
+
+
+def save_schema_snapshot(
+    path: str | None,
+    identity: dict,
+    tables: dict,
+    foreign_keys: dict,
+    fingerprint: str,
+):
+    """
+    Persist the analyzed schema (atomic replace). Failures are logged,
+    never raised: the snapshot is an optimization only.
+    """
+    if not path:
+        return
+
+    snapshot = {
+        "identity": identity,
+        "fingerprint": fingerprint,
+        "tables": {
+            table: {
+                "columns": sorted(meta["columns"]),
+                "primary_keys": sorted(meta["primary_keys"]),
+            }
+            for table, meta in tables.items()
+        },
+        "foreign_keys": {
+            table: [list(fk) for fk in fks]
+            for table, fks in foreign_keys.items()
+        },
+    }
+
+    tmp_path = None
+
+    try:
+        # Unique temp file per writer (processes / databases may race)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=Path(path).parent, prefix=f".{Path(path).name}.", suffix=".tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    except OSError as e:
+        logger.warning(f"Could not write schema snapshot {path}: {e}")
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def load_database_schema(engine, db_path: Path, snapshot_path: str | None):
+    """
+    (tables, foreign_keys, fingerprint) of one database.
+
+    Reuses the snapshot when the DB file identity / schema_version
+    still match, otherwise introspects and refreshes the snapshot.
+    """
+    identity = schema_identity(engine, db_path)
+
+    snapshot = load_schema_snapshot(snapshot_path, identity)
+    if snapshot is not None:
+        return snapshot
+
+    tables, foreign_keys = analyze_schema(engine)
+    fingerprint = compute_schema_fingerprint(tables, foreign_keys)
+
+    save_schema_snapshot(snapshot_path, identity, tables, foreign_keys, fingerprint)
+
+    return tables, foreign_keys, fingerprint
@@ -0,0 +1,77 @@
+from sqlglot import exp
+
+from text_to_sql_agent.sql_tools.sql_parsing import (
+    has_text_derived_columns,
+    parse_query,
+)
+
+
+def _literal_limit(query: exp.Query) -> int | None:
+    limit = query.args.get("limit")
+    if limit is None:
+        return None
+
+    value = limit.expression
+    if isinstance(value, exp.Literal) and value.is_int:
+        return int(value.this)
+
+    if isinstance(value, exp.Placeholder):
+        return -2  # bound parameter (SQL template)
+
+    return -1  # non-literal LIMIT expression
+
+
+def apply_row_cap(sql: str, cap: int) -> str:
+    """
+    Push a row cap down into the outer query's LIMIT.
+
+    - No LIMIT            → LIMIT cap is added
+    - LIMIT n with n > cap → tightened to LIMIT cap
+    - LIMIT n with n <= cap → SQL returned unchanged
+    - LIMIT :param         → LIMIT MIN(:param, cap)
+    - Non-literal LIMIT    → query is wrapped and capped outside
+
+    SQL whose column names come from its own text (e.g. an unaliased
+    count(*)) is never regenerated, which would rename those columns:
+    LIMIT cap is appended to the original text when there is no LIMIT,
+    otherwise the SQL is left as is (the cursor fetch still caps it).
+
+    Args:
+        sql: Validated SELECT / WITH query.
+        cap: Maximum number of rows the database may produce.
+
+    Returns:
+        SQL string whose result never exceeds `cap` rows.
+    """
+    parsed = parse_query(sql)
+
+    if not parsed.is_read_only:
+        return sql
+
+    current = _literal_limit(parsed.tree)
+
+    if current is not None and 0 <= current <= cap:
+        return sql
+
+    if has_text_derived_columns(parsed.tree):
+        if current is None:
+            return f"{sql.rstrip().rstrip(';').rstrip()} LIMIT {cap}"
+        return sql
+
+    # Cached AST is shared → always rewrite a copy
+    tree = parsed.tree.copy()
+
+    if current == -2:
+        # Capped in place: wrapping would rename the output columns
+        limit = tree.args["limit"]
+        limit.set(
+            "expression",
+            exp.func("MIN", limit.expression.copy(), exp.Literal.number(cap)),
+        )
+        capped = tree
+    elif current == -1:
+        capped = exp.select("*").from_(tree.subquery("_capped")).limit(cap)
+    else:
+        capped = tree.limit(cap, copy=False)
+
+    return capped.sql(dialect="sqlite")
@@ -0,0 +1,259 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Mapping
+
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+
+from text_to_sql_agent.sql_tools.sql_parsing import parse_query
+
+# "SCAN a USING COVERING INDEX idx", "SEARCH t USING INTEGER PRIMARY KEY (rowid=?)"
+# (older SQLite: "SCAN TABLE tracks AS t")
+_ACCESS = re.compile(
+    r"^(SCAN|SEARCH) (?:TABLE |SUBQUERY )?(\S+)(?: AS (\S+))?(?: USING (.*))?$"
+)
+_TEMP_BTREE = re.compile(r"^USE TEMP B-TREE FOR (.*)$")
+_SUBQUERY = re.compile(r"^(CORRELATED )?(?:SCALAR|LIST) SUBQUERY")
+
+# Cost-model constants (row visits)
+UNKNOWN_ROWS = 1000     # CTE / subquery results, tables without an estimate
+INDEX_FANOUT = 10       # rows per lookup through a non-unique index
+
+
+# ============================================================
+# Plan steps
+# ============================================================
+@dataclass(frozen=True)
+class PlanStep:
+    """
+    One EXPLAIN QUERY PLAN row.
+
+    kind: "scan", "search", "temp_btree", "subquery", "correlated"
+        or "other" (containers: MATERIALIZE, CO-ROUTINE, COMPOUND ...).
+    name: Table / alias scanned or searched (None otherwise).
+    using: Access path ("COVERING INDEX idx", "INTEGER PRIMARY KEY ...").
+    """
+    id: int
+    parent: int
+    detail: str
+    kind: str
+    name: str | None = None
+    using: str | None = None
+
+
+def parse_plan_step(step_id: int, parent: int, detail: str) -> PlanStep:
+    if detail == "SCAN CONSTANT ROW":
+        return PlanStep(step_id, parent, detail, "other")
+
+    match = _ACCESS.match(detail)
+    if match:
+        verb, name, alias, using = match.groups()
+        return PlanStep(
+            step_id, parent, detail, verb.lower(), (alias or name).lower(), using
+        )
+
+    if _TEMP_BTREE.match(detail):
+        return PlanStep(step_id, parent, detail, "temp_btree")
+
+    match = _SUBQUERY.match(detail)
+    if match:
+        kind = "correlated" if match.group(1) else "subquery"
+        return PlanStep(step_id, parent, detail, kind)
+
+    return PlanStep(step_id, parent, detail, "other")
+
+
+# ============================================================
+# Structured plan + cost model
+# ============================================================
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    Parsed plan of one query with its estimated cost.
+
+    cost: Estimated row visits (nested loops multiply, see _nest_cost).
+    issues: Reasons the plan gate rejects (or flags) the query.
+    """
+    steps: tuple[PlanStep, ...]
+    scans: tuple[tuple[str, int | None], ...]
+    searches: tuple[str, ...]
+    indexes: tuple[str, ...]
+    temp_btrees: tuple[str, ...]
+    correlated_subqueries: int
+    cartesian: tuple[str, ...]
+    bounded: bool
+    cost: int
+    issues: tuple[str, ...]
+
+    def summary(self) -> dict:
+        return {
+            "cost": self.cost,
+            "scans": [
+                {"table": table, "rows": rows} for table, rows in self.scans
+            ],
+            "searches": list(self.searches),
+            "indexes": list(self.indexes),
+            "temp_btrees": list(self.temp_btrees),
+            "correlated_subqueries": self.correlated_subqueries,
+            "cartesian": list(self.cartesian),
+            "bounded": self.bounded,
+            "issues": list(self.issues),
+        }
+
+
+def _index_name(using: str | None) -> str | None:
+    if not using:
+        return None
+    match = re.search(r"INDEX (\S+)", using)
+    # AUTOMATIC indexes are transient: "INDEX (Name=?)"
+    if match and not match.group(1).startswith("("):
+        return match.group(1)
+    return None
+
+
+def _search_fanout(using: str | None) -> int:
+    # Equality on the rowid / a unique key → one row per lookup
+    if using and ("PRIMARY KEY" in using or "sqlite_autoindex" in using):
+        return 1
+    return INDEX_FANOUT
+
+
+def _is_bounded(sql: str) -> bool:
+    """
+    True when the result has a LIMIT, or is one aggregate row
+    (aggregate without GROUP BY). Aggregates inside subqueries or
+    window functions do not collapse the outer rows.
+    """
+    try:
+        tree = parse_query(sql).tree
+    except (SqlglotError, ValueError):
+        return False
+
+    if not isinstance(tree, exp.Select):
+        return tree.args.get("limit") is not None
+
+    if tree.args.get("limit") is not None:
+        return True
+
+    return tree.args.get("group") is None and any(
+        aggregate.find_ancestor(exp.Subquery, exp.Window) is None
+        for select in tree.selects
+        for aggregate in select.find_all(exp.AggFunc)
+    )
+
+
+def _table_of(name: str, sql: str) -> str:
+    try:
+        return parse_query(sql).alias_map.get(name, name)
+    except (SqlglotError, ValueError):
+        return name
+
+
+def build_query_plan(
+    sql: str,
+    rows,
+    table_rows: Mapping[str, int],
+    fact_tables=frozenset(),
+    max_scan_rows: int = 1_000_000,
+    max_cost: int = 100_000_000,
+) -> QueryPlan:
+    """
+    Parse EXPLAIN QUERY PLAN rows (id, parent, notused, detail) and
+    apply the cost model.
+
+    Issues raised:
+        - a full scan of a fact table of at least max_scan_rows rows
+          in a query without LIMIT (and not a single aggregate row);
+        - estimated row visits above max_cost (nested-loop cartesian
+          scans are named in the message).
+    """
+    steps = tuple(
+        parse_plan_step(int(row[0]), int(row[1]), str(row[-1])) for row in rows
+    )
+
+    children: dict[int, list[PlanStep]] = defaultdict(list)
+    for step in steps:
+        children[step.parent].append(step)
+
+    def _rows(step: PlanStep) -> int | None:
+        return table_rows.get(_table_of(step.name, sql))
+
+    cartesian: list[str] = []
+
+    def _nest_cost(parent: int, outer: int) -> int:
+        """
+        Row visits of the loop nest under `parent`, run `outer` times.
+        Steps at one level are nested loops, in plan order.
+        """
+        loop, cost, scanned = outer, 0, []
+
+        for step in children.get(parent, ()):
+            if step.kind == "scan":
+                rows = _rows(step)
+                loop *= rows if rows is not None else UNKNOWN_ROWS
+                cost += loop
+                table = _table_of(step.name, sql)
+                scanned.append(table if table == step.name else f"{table} {step.name}")
+            elif step.kind == "search":
+                loop *= _search_fanout(step.using)
+                cost += loop
+            elif step.kind == "correlated":
+                # Re-run for every row of the enclosing loop
+                cost += _nest_cost(step.id, loop)
+            elif step.kind == "temp_btree":
+                cost += loop
+            else:
+                cost += _nest_cost(step.id, 1)
+
+        if len(scanned) > 1:
+            cartesian.append(" × ".join(scanned))
+
+        return cost
+
+    cost = _nest_cost(0, 1)
+    bounded = _is_bounded(sql)
+
+    scans = []
+    for step in steps:
+        if step.kind == "scan":
+            scans.append((_table_of(step.name, sql), _rows(step)))
+
+    issues = []
+
+    for table, rows in scans:
+        if (
+            not bounded
+            and table in fact_tables
+            and rows is not None
+            and rows >= max_scan_rows
+        ):
+            issues.append(
+                f"full scan of fact table {table} (~{rows} rows) without LIMIT"
+            )
+
+    if cost > max_cost:
+        reason = f"estimated {cost} row visits exceed the limit of {max_cost}"
+        if cartesian:
+            reason += f" (nested-loop cartesian scan: {', '.join(cartesian)})"
+        issues.append(reason)
+
+    return QueryPlan(
+        steps=steps,
+        scans=tuple(scans),
+        searches=tuple(
+            _table_of(step.name, sql) for step in steps if step.kind == "search"
+        ),
+        indexes=tuple(dict.fromkeys(
+            name for step in steps if (name := _index_name(step.using))
+        )),
+        temp_btrees=tuple(
+            _TEMP_BTREE.match(step.detail).group(1)
+            for step in steps if step.kind == "temp_btree"
+        ),
+        correlated_subqueries=sum(1 for step in steps if step.kind == "correlated"),
+        cartesian=tuple(cartesian),
+        bounded=bounded,
+        cost=cost,
+        issues=tuple(issues),
+    )
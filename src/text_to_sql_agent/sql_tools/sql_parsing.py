@@ -1,5 +1,120 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
 from sqlglot import parse_one, exp
 
+PARSE_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """
+    Result of parsing ONE SQL string, shared by every validator.
+
+    The AST is cached and shared: consumers must NOT mutate it
+    (use tree.copy() before rewriting).
+    """
+
+    sql: str
+    tree: exp.Expression
+    statement_type: str
+    tables: frozenset[str]
+    alias_map: Mapping[str, str]
+    joins: tuple[tuple[str, str, str, str], ...]
+    has_comments: bool
+
+    @property
+    def is_read_only(self) -> bool:
+        return isinstance(self.tree, exp.Query)
+
+
+def extract_alias_map(tree) -> dict[str, str]:
+    """
+    Build alias → table name mapping from FROM and JOIN clauses.
+    """
+    alias_map = {}
+
+    for table in tree.find_all(exp.Table):
+        table_name = table.name.lower()
+        alias = table.alias
+
+        if alias:
+            alias_map[alias.lower()] = table_name
+        else:
+            alias_map[table_name] = table_name
+
+    return alias_map
+
+
+def _extract_joins(tree, alias_map) -> list[tuple[str, str, str, str]]:
+    """
+    Resolve equi-join conditions to (table, column, table, column).
+    """
+    joins = []
+
+    for join in tree.find_all(exp.Join):
+        on = join.args.get("on")
+        if not on or not isinstance(on, exp.EQ):
+            continue
+
+        left, right = on.left, on.right
+
+        if isinstance(left, exp.Column) and isinstance(right, exp.Column):
+            lt = alias_map.get(left.table.lower())
+            rt = alias_map.get(right.table.lower())
+
+            if not lt or not rt:
+                continue
+
+            joins.append((
+                lt,
+                left.name.lower(),
+                rt,
+                right.name.lower()
+            ))
+
+    return joins
+
+
+def _has_comments(sql: str, tree) -> bool:
+    normalized = sql.lower()
+
+    if "--" in normalized or "/*" in normalized:
+        return True
+
+    return any(node.comments for node in tree.walk())
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_query(sql: str) -> ParsedQuery:
+    """
+    Parse a SQL string once and derive everything validators need.
+    Memoized in a bounded LRU; parse errors propagate (and are not cached).
+
+    Args:
+        sql: SQL string.
+
+    Returns:
+        ParsedQuery.
+    """
+    tree = parse_one(sql, read="sqlite")
+    alias_map = extract_alias_map(tree)
+
+    return ParsedQuery(
+        sql=sql,
+        tree=tree,
+        statement_type=tree.key,
+        tables=frozenset(
+            t.name.lower() for t in tree.find_all(exp.Table) if t.name
+        ),
+        alias_map=MappingProxyType(alias_map),
+        joins=tuple(_extract_joins(tree, alias_map)),
+        has_comments=_has_comments(sql, tree),
+    )
+
+
 def extract_tables(sql: str) -> set[str]:
     """
     Extract table names from a SQL query.
@@ -10,6 +125,18 @@ def extract_tables(sql: str) -> set[str]:
     Returns:
         Set of table names.
     """
-    tree = parse_one(sql, read="sqlite")
-    return {t.name.lower() for t in tree.find_all(exp.Table) if t.name}
+    return set(parse_query(sql).tables)
+
 
+def has_text_derived_columns(tree) -> bool:
+    """
+    True when some result column is named after its expression text.
+
+    SQLite names an unaliased expression column (e.g. count(*)) by its
+    exact source text, so re-generated SQL may rename that column.
+    Aliased expressions, column references and * keep their names.
+    """
+    return any(
+        not isinstance(select, (exp.Alias, exp.Column, exp.Star))
+        for select in tree.selects
+    )
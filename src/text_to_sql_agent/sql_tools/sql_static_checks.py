@@ -1,8 +1,8 @@
-from text_to_sql_agent.sql_tools.sql_parsing import extract_tables
-from text_to_sql_agent.runtime_bootstrap import FOREIGN_KEYS
+from text_to_sql_agent.sql_tools.sql_parsing import parse_query
+from text_to_sql_agent.runtime_bootstrap import get_runtime_catalog
 from text_to_sql_agent.sql_validation.join_validator import validate_joins
 
-def sql_static_check(sql: str) -> str:
+def sql_static_check(sql: str, database_id: str | None = None) -> str:
     if not sql:
         return "INVALID: Empty query."
 
@@ -11,18 +11,22 @@ def sql_static_check(sql: str) -> str:
     if not normalized.startswith(("select", "with")):
         return "INVALID: Only SELECT or WITH queries are allowed."
 
-    if "--" in normalized or "/*" in normalized:
-        return "INVALID: SQL comments are not allowed."
-
+    # Single parse, shared by every check below
     try:
-        extract_tables(sql)
+        parsed = parse_query(sql)
     except Exception:
         return "INVALID: Failed to parse SQL."
 
+    if parsed.has_comments:
+        return "INVALID: SQL comments are not allowed."
+
+    if not parsed.is_read_only:
+        return "INVALID: Only SELECT or WITH queries are allowed."
+
     try:
-        if " join " in normalized and not validate_joins(sql, FOREIGN_KEYS):
+        if not validate_joins(parsed, get_runtime_catalog(database_id)):
             return "INVALID: Join condition does not match schema foreign keys."
     except Exception:
         return "INVALID: Failed to validate join conditions."
 
-    return "VALID"
\ No newline at end of file
+    return "VALID"
@@ -1,14 +1,58 @@
+import asyncio
+import hashlib
 import logging
+import time
+from typing import Callable
 from sqlalchemy import text
 import sqlalchemy
 
-from text_to_sql_agent.db import engine
+from text_to_sql_agent.config import settings
+from text_to_sql_agent.db_registry import get_database_registry
+from text_to_sql_agent.caching.validation_cache import get_validation_cache
+from text_to_sql_agent.caching.plan_cache import get_plan_cache
+from text_to_sql_agent.caching.result_cache import (
+    adata_version,
+    data_version,
+    get_result_cache,
+    result_cache_key,
+)
 
 from text_to_sql_agent.sql_tools.sql_static_checks import sql_static_check
+from text_to_sql_agent.sql_tools.limit_pushdown import apply_row_cap
+from text_to_sql_agent.sql_tools.query_plan import QueryPlan, build_query_plan
+from text_to_sql_agent.runtime.metrics import observe_plan_gate
 
 logger = logging.getLogger(__name__)
 sql_logger = logging.getLogger("text_to_sql_agent.sql")
 
+# Post-execution safety limit (rows)
+MAX_ROWS = 1000
+
+# SQLite VM instructions between deadline checks
+PROGRESS_HANDLER_STEPS = 10_000
+
+# EXPLAIN failures that repeat for the same SQL and schema; anything
+# else (locked / busy database, pool timeout, I/O) may pass on retry
+_DETERMINISTIC_ERRORS = (
+    "syntax error",
+    "incomplete input",
+    "unrecognized token",
+    "no such table",
+    "no such column",
+    "no such function",
+    "ambiguous column name",
+    "misuse of aggregate",
+    "wrong number of arguments",
+)
+
+
+def _is_deterministic_error(error: Exception) -> bool:
+    if not isinstance(error, sqlalchemy.exc.OperationalError):
+        return False
+    message = str(error.orig).lower()
+    return any(marker in message for marker in _DETERMINISTIC_ERRORS)
+
+
 class HardTermination(Exception):
     """
     Raised when the system must immediately stop execution.
@@ -16,40 +60,377 @@ class HardTermination(Exception):
     pass
 
 
-def sql_check_tool(query: str) -> str:
-    static_check = sql_static_check(query)
-    if static_check != "VALID":
-        return static_check
+class ExecutionTimeout(HardTermination):
+    """
+    Raised when a query exceeds its execution budget.
+    """
+    pass
 
-    with engine.connect() as conn:
-        try:
-            conn.execute(text(f"EXPLAIN QUERY PLAN {query}"))
-            return "VALID"
-        except sqlalchemy.exc.SQLAlchemyError as e:
-            return f"INVALID: {str(e)}"
 
+def _deadline_handler(timeout_seconds: float):
+    """
+    SQLite progress handler that aborts the running statement
+    once the deadline has passed (non-zero return → interrupt).
+    """
+    deadline = time.monotonic() + timeout_seconds
+
+    def _handler():
+        return 1 if time.monotonic() > deadline else 0
+
+    return _handler
+
+
+def _timeout_error(timeout_seconds: float) -> ExecutionTimeout:
+    return ExecutionTimeout(
+        f"Query exceeded the execution budget of {timeout_seconds:g} seconds."
+    )
+
+
+def issue_validation_token(query: str, database_id: str | None = None) -> str:
+    """
+    Token proving `query` passed sql_check_tool under the database's
+    current schema.
+
+    It is bound to both the exact SQL text and the schema fingerprint,
+    so any change to either invalidates it.
+    """
+    fingerprint = get_database_registry().get(database_id).fingerprint
+    raw = f"{fingerprint}\n{query}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _has_fresh_token(
+    query: str,
+    validation_token: str | None,
+    database_id: str | None,
+) -> bool:
+    return (
+        validation_token is not None
+        and validation_token == issue_validation_token(query, database_id)
+    )
+
+
+def _capped_query(query: str, max_rows: int) -> tuple[str, int]:
+    """
+    Rewrite the query so the DATABASE stops after max_rows + 1 rows.
 
-def sql_exec_tool(query: str):
+    The extra row is what lets callers detect "more than max_rows"
+    without ever materializing the full result.
+    """
+    fetch_limit = max_rows + 1
+
+    try:
+        return apply_row_cap(query, fetch_limit), fetch_limit
+    except Exception:
+        # Cursor-level fetchmany still bounds the fetch
+        return query, fetch_limit
+
+
+def _replay_rows(rows, max_rows: int, chunk_size: int | None, on_rows):
+    """
+    Feed cached rows to an on_rows callback the way a fetch would.
+    """
+    visible = rows[:max_rows]
+    step = chunk_size or len(visible) or 1
+
+    for start in range(0, len(visible), step):
+        on_rows(visible[start:start + step])
+
+
+# ============================================================
+# Query plan gate
+# ============================================================
+def _plan_verdict(plan: QueryPlan) -> str:
+    """
+    Plan issues make the query INVALID only when PLAN_GATE is "reject"
+    (the message then drives the usual repair loop).
+    """
+    if not plan.issues:
+        outcome, verdict = "pass", "VALID"
+    elif settings.plan_gate == "reject":
+        outcome = "rejected"
+        verdict = f"INVALID: Query plan rejected: {'; '.join(plan.issues)}."
+    else:
+        outcome, verdict = "flagged", "VALID"
+
+    observe_plan_gate(outcome)
+    return verdict
+
+
+def _store_plan(database, query: str, rows) -> QueryPlan:
+    plan = build_query_plan(
+        query,
+        rows,
+        database.table_rows,
+        database.catalog.fact_tables,
+        max_scan_rows=settings.plan_max_scan_rows,
+        max_cost=settings.plan_max_cost,
+    )
+    get_plan_cache().put(query, database, plan)
+    return plan
+
+
+def query_plan_summary(query: str | None, database_id: str | None = None) -> dict | None:
+    """
+    Plan summary of checked SQL (None when PLAN_GATE is off or the plan
+    is no longer cached).
+    """
+    plans = get_plan_cache()
+    if plans is None or not query:
+        return None
+
+    database = get_database_registry().get(database_id)
+    plan = plans.peek(query, database)
+    return plan.summary() if plan is not None else None
+
+
+def sql_check_tool(
+    query: str,
+    database_id: str | None = None,
+    params: dict | None = None,
+) -> str:
+    database = get_database_registry().get(database_id)
+    cache = get_validation_cache()
+
+    cached = cache.get(query, database)
+    if cached is not None:
+        return cached
+
+    verdict = sql_static_check(query, database_id)
+    cacheable = True
+
+    if verdict == "VALID":
+        # Same canonical SQL already explained → no EXPLAIN round trip
+        plans = get_plan_cache()
+        plan = plans.get(query, database) if plans is not None else None
+
+        if plan is None:
+            with database.engine.connect() as conn:
+                try:
+                    rows = conn.execute(
+                        text(f"EXPLAIN QUERY PLAN {query}"), params or {}
+                    ).fetchall()
+                except sqlalchemy.exc.SQLAlchemyError as e:
+                    verdict = f"INVALID: {str(e)}"
+                    cacheable = _is_deterministic_error(e)
+                else:
+                    if plans is not None:
+                        plan = _store_plan(database, query, rows)
+
+        if plan is not None:
+            verdict = _plan_verdict(plan)
+
+    if cacheable:
+        cache.put(query, database, verdict)
+    return verdict
+
+
+def sql_exec_tool(
+    query: str,
+    validation_token: str | None = None,
+    max_rows: int = MAX_ROWS,
+    database_id: str | None = None,
+    params: dict | None = None,
+):
     """
     Execute a validated SQL query.
 
     Args:
         query: SQL query.
+        validation_token: Token from issue_validation_token. When it
+            matches, the query is trusted and NOT re-checked.
+        max_rows: Row cap. At most max_rows + 1 rows are fetched.
+        database_id: Registry id (default database when None).
+        params: Bind parameters for a parameterized query (:name).
 
     Returns:
-        Query result rows.
+        Query result rows (CachedRows when served by the result cache).
+
+    Raises:
+        HardTermination if validation fails.
+    """
+    sql_logger.info(f"SQL generated by LLM:\n{query}")
+
+    if not _has_fresh_token(query, validation_token, database_id):
+        check = sql_check_tool(query, database_id, params)
+        if check != "VALID":
+            sql_logger.warning(f"SQL Schema validation failed:\n{check}")
+            raise HardTermination(check)
+
+    database = get_database_registry().get(database_id)
+    cache = get_result_cache()
+
+    if cache is not None:
+        # Version read BEFORE executing: a concurrent write can only make
+        # the stored entry look older than its data, never newer
+        cache_key = result_cache_key(database, query, max_rows, params)
+        version = data_version(database)
+
+        cached = cache.lookup(cache_key, version)
+        if cached is not None:
+            logger.info("SQL result served from cache")
+            return cached
+
+    capped_query, fetch_limit = _capped_query(query, max_rows)
+    timeout = settings.sql_execution_timeout_seconds
+
+    with database.engine.connect() as conn:
+        dbapi_conn = conn.connection.dbapi_connection
+
+        if timeout > 0:
+            dbapi_conn.set_progress_handler(
+                _deadline_handler(timeout), PROGRESS_HANDLER_STEPS
+            )
+
+        try:
+            result = conn.execute(text(capped_query), params or {})
+            rows = result.fetchmany(fetch_limit)
+            result.close()
+        except sqlalchemy.exc.OperationalError as e:
+            if "interrupted" in str(e):
+                sql_logger.warning(f"SQL execution timed out:\n{query}")
+                raise _timeout_error(timeout) from e
+            raise
+        finally:
+            # Pooled connection: never leak the handler to the next user
+            dbapi_conn.set_progress_handler(None, 0)
+
+    logger.info("SQL Executed Successfully")
+
+    if cache is not None:
+        cache.store(cache_key, version, rows)
+
+    return rows
+
+
+async def asql_check_tool(
+    query: str,
+    database_id: str | None = None,
+    params: dict | None = None,
+) -> str:
+    """
+    Async variant of sql_check_tool (non-blocking EXPLAIN).
+    """
+    database = get_database_registry().get(database_id)
+    cache = get_validation_cache()
+
+    cached = cache.get(query, database)
+    if cached is not None:
+        return cached
+
+    verdict = sql_static_check(query, database_id)
+    cacheable = True
+
+    if verdict == "VALID":
+        plans = get_plan_cache()
+        plan = plans.get(query, database) if plans is not None else None
+
+        if plan is None:
+            async with database.async_engine.connect() as conn:
+                try:
+                    result = await conn.execute(
+                        text(f"EXPLAIN QUERY PLAN {query}"), params or {}
+                    )
+                    rows = result.fetchall()
+                except sqlalchemy.exc.SQLAlchemyError as e:
+                    verdict = f"INVALID: {str(e)}"
+                    cacheable = _is_deterministic_error(e)
+                else:
+                    if plans is not None:
+                        # First use of a database reads its table sizes
+                        plan = await asyncio.to_thread(_store_plan, database, query, rows)
+
+        if plan is not None:
+            verdict = _plan_verdict(plan)
+
+    if cacheable:
+        cache.put(query, database, verdict)
+    return verdict
+
+
+async def asql_exec_tool(
+    query: str,
+    validation_token: str | None = None,
+    max_rows: int = MAX_ROWS,
+    chunk_size: int | None = None,
+    on_rows: Callable[[list], None] | None = None,
+    database_id: str | None = None,
+    params: dict | None = None,
+):
+    """
+    Async variant of sql_exec_tool.
+
+    Args:
+        chunk_size: When set, rows are fetched in chunks of this size.
+        on_rows: Called with each fetched chunk (never with rows beyond
+            max_rows), so callers can stream rows as they arrive.
 
     Raises:
         HardTermination if validation fails.
     """
     sql_logger.info(f"SQL generated by LLM:\n{query}")
 
-    check = sql_check_tool(query)
-    if check != "VALID":
-        sql_logger.warning(f"SQL Schema validation failed:\n{check}")
-        raise HardTermination(check)
+    if not _has_fresh_token(query, validation_token, database_id):
+        check = await asql_check_tool(query, database_id, params)
+        if check != "VALID":
+            sql_logger.warning(f"SQL Schema validation failed:\n{check}")
+            raise HardTermination(check)
+
+    database = get_database_registry().get(database_id)
+    cache = get_result_cache()
+
+    if cache is not None:
+        cache_key = result_cache_key(database, query, max_rows, params)
+        version = await adata_version(database)
+
+        cached = cache.lookup(cache_key, version)
+        if cached is not None:
+            logger.info("SQL result served from cache")
+            if on_rows is not None:
+                _replay_rows(cached, max_rows, chunk_size, on_rows)
+            return cached
+
+    capped_query, fetch_limit = _capped_query(query, max_rows)
+    timeout = settings.sql_execution_timeout_seconds
+
+    async with database.async_engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        driver_conn = raw_conn.driver_connection
+
+        if timeout > 0:
+            await driver_conn.set_progress_handler(
+                _deadline_handler(timeout), PROGRESS_HANDLER_STEPS
+            )
+
+        try:
+            # stream() → unbuffered cursor, so fetchmany really stops early
+            result = await conn.stream(text(capped_query), params or {})
+            rows = []
+
+            while len(rows) < fetch_limit:
+                chunk = await result.fetchmany(
+                    min(chunk_size or fetch_limit, fetch_limit - len(rows))
+                )
+                if not chunk:
+                    break
+
+                if on_rows is not None and len(rows) < max_rows:
+                    on_rows(chunk[: max_rows - len(rows)])
+
+                rows.extend(chunk)
+
+            await result.close()
+        except sqlalchemy.exc.OperationalError as e:
+            if "interrupted" in str(e):
+                sql_logger.warning(f"SQL execution timed out:\n{query}")
+                raise _timeout_error(timeout) from e
+            raise
+        finally:
+            await driver_conn.set_progress_handler(None, 0)
+
+    logger.info("SQL Executed Successfully")
+
+    if cache is not None:
+        cache.store(cache_key, version, rows)
 
-    with engine.connect() as conn:
-        rows = conn.execute(text(query)).fetchall()
-        logger.info("SQL Executed Successfully")
-        return rows
+    return rows
@@ -1,5 +1,5 @@
 from text_to_sql_agent.graph_state import GraphState
-from text_to_sql_agent.runtime_bootstrap import SCHEMA_FINGERPRINT
+from text_to_sql_agent.runtime_bootstrap import get_schema_fingerprint
 
 
 def build_initial_state(
@@ -10,6 +10,8 @@ def build_initial_state(
     max_retries: int = GraphState.max_retries,
     default_recent_limit: int = GraphState.default_recent_limit,
     default_popular_limit: int = GraphState.default_popular_limit,
+    summary_mode: str = GraphState.summary_mode,
+    database_id: str | None = None,
 ) -> GraphState:
     """
     Build the initial graph state.
@@ -20,12 +22,19 @@ def build_initial_state(
         user_query=user_query,
         schema_context=schema_context,
         schema_entities=schema_entities,
+        schema_subset=None,
+        schema_retrieval=None,
+        few_shot_examples=[],
 
         execution_mode=None,
+        intent=None,
 
         sql_query=None,
         sql_valid=False,
         validation_error=None,
+        validation_token=None,
+        query_plan=None,
+        sql_candidates=[],
         execution_result=None,
 
         retry_count=0,
@@ -34,16 +43,35 @@ def build_initial_state(
         default_recent_limit=default_recent_limit,
         default_popular_limit=default_popular_limit,
 
+        summary_mode=summary_mode,
+
         # --- observability defaults ---
         last_error_type=None,
         last_error_message=None,
         termination_reason=None,
         retry_reason=None,
 
-        schema_fingerprint=SCHEMA_FINGERPRINT,
+        database_id=database_id,
+        schema_fingerprint=get_schema_fingerprint(database_id),
+
+        # --- question cache defaults ---
+        sql_cache_key=None,
+        sql_cache_hit=False,
+
+        # --- SQL template defaults ---
+        sql_template_key=None,
+        sql_template_hit=False,
+        sql_params=None,
 
         # --- Tool metadata ---
         invoked_tools=[],
+        prompt_usage=[],
+
+        # --- Timing defaults ---
+        node_timings=[],
+        db_execution_ms=None,
+        rows_returned=None,
+        result_cache_hit=False,
 
         llm=llm,  # PASS THROUGH EXISTING LLM
 
@@ -3,9 +3,9 @@ import json
 
 
 @tool
-def summarize_result_table(rows: list[dict]) -> str:
+def summarize_result_table(digest: dict) -> str:
     """
-    Generate a concise, natural-language insight from a SQL result table.
+    Generate a concise, natural-language insight from a SQL result digest.
     Focus on key patterns, extremes, or rankings.
     Do NOT explain the schema.
     Do NOT describe columns.
@@ -15,7 +15,9 @@ def summarize_result_table(rows: list[dict]) -> str:
 
     return (
         "You are a data analyst explaining query results to a business user.\n\n"
-        "Given the following SQL query result (as JSON rows), write ONE or TWO sentences "
+        "Given the following digest of a SQL query result (row count, column types, "
+        "numeric min/max/mean, top/bottom rows by the main measure and a sample, "
+        "or the full rows when the result is small), write ONE or TWO sentences "
         "summarizing the most important insight.\n\n"
         "Rules:\n"
         "- Do NOT explain what the columns mean\n"
@@ -24,5 +26,5 @@ def summarize_result_table(rows: list[dict]) -> str:
         "- Focus on rankings, highest/lowest values, or notable patterns\n"
         "- Use actual values from the data\n"
         "- Keep it concise and natural\n\n"
-        f"SQL Result:\n{json.dumps(rows, indent=2)}"
+        f"SQL Result Digest:\n{json.dumps(digest, separators=(',', ':'), ensure_ascii=False, default=str)}"
     )
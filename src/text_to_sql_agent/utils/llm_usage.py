@@ -0,0 +1,24 @@
+def extract_prompt_usage(response) -> dict:
+    """
+    Read prompt/completion token usage from a LangChain AIMessage.
+
+    cached_prompt_tokens comes from the provider's prompt-cache report
+    (e.g. OpenAI input_token_details.cache_read). Providers that do not
+    report it (e.g. Ollama) yield None rather than a guess.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+
+    prompt_tokens = usage.get("input_tokens")
+    cached = details.get("cache_read")
+
+    uncached = None
+    if prompt_tokens is not None and cached is not None:
+        uncached = prompt_tokens - cached
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": usage.get("output_tokens"),
+        "cached_prompt_tokens": cached,
+        "uncached_prompt_tokens": uncached,
+    }